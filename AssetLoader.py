@@ -1,4 +1,7 @@
 import os
+import sqlite3
+import tempfile
+import time
 from functools import partial
 
 import sys
@@ -16,23 +19,117 @@ from PySide2.QtGui import *
 
 from shiboken2 import wrapInstance
 
-import common.utils
-
 from common.Prefs import *
 from .Standin import *
+from .StaleReport import *
+from .StandinInventory import *
+from .ScenePrefetcher import *
+from .VersionCache import *
+from .StandinTableModel import *
+from .Profiler import *
 
 import maya.OpenMaya as OpenMaya
 
 # ######################################################################################################################
 
 _FILE_NAME_PREFS = "asset_loader"
+# Delay to coalesce the bursts of selection changes
+_SELECTION_DELAY_MS = 150
+
+
+# ######################################################################################################################
+
+class _VersionIndexWarmerSignals(QObject):
+    finished = Signal(int)
+
+
+class _ChangedDirsFinderSignals(QObject):
+    found = Signal(list)
+
+
+class _ChangedDirsFinder(QRunnable):
+    def __init__(self, version_index):
+        """
+        Constructor
+        :param version_index
+        """
+        super(_ChangedDirsFinder, self).__init__()
+        self.signals = _ChangedDirsFinderSignals()
+        self.__version_index = version_index
+
+    def run(self):
+        """
+        Check the mtimes of the directories listed in a worker thread
+        :return:
+        """
+        changed_dirs = self.__version_index.get_changed_dirs()
+        if len(changed_dirs) > 0:
+            self.signals.found.emit(changed_dirs)
+
+
+class _VersionIndexWarmer(QRunnable):
+    def __init__(self, version_index, dsos, generation):
+        """
+        Constructor
+        :param version_index
+        :param dsos: dso paths of the standins to parse
+        :param generation: generation of the selection
+        """
+        super(_VersionIndexWarmer, self).__init__()
+        self.signals = _VersionIndexWarmerSignals()
+        self.__version_index = version_index
+        self.__dsos = dsos
+        self.__generation = generation
+
+    def run(self):
+        """
+        List the publish directories in a worker thread
+        :return:
+        """
+        try:
+            self.__version_index.warm(self.__dsos)
+        finally:
+            self.signals.finished.emit(self.__generation)
 
 
 # ######################################################################################################################
 
 class AssetLoader(QtWidgets.QDialog):
+    # Dialog kept alive between two openings of the tool
+    __instance = None
 
-    def __init__(self, prnt=wrapInstance(int(omui.MQtUtil.mainWindow()), QtWidgets.QWidget)):
+    @staticmethod
+    def show_instance():
+        """
+        Show the dialog of the tool. It is created on the first call then only hidden and shown again, with its
+        widgets and its standins
+        :return: instance
+        """
+        if AssetLoader.__instance is None:
+            AssetLoader.__instance = AssetLoader(persistent=True)
+        instance = AssetLoader.__instance
+        instance.show()
+        instance.raise_()
+        instance.activateWindow()
+        return instance
+
+    @staticmethod
+    def delete_instance():
+        """
+        Close and delete the dialog kept alive (before reloading the package)
+        :return:
+        """
+        if AssetLoader.__instance is None:
+            return
+        instance = AssetLoader.__instance
+        AssetLoader.__instance = None
+        instance.close()
+        instance.__remove_scene_callbacks()
+        instance.deleteLater()
+
+    def __init__(self, prnt=None, persistent=False):
+        if prnt is None:
+            prnt = wrapInstance(int(omui.MQtUtil.mainWindow()), QtWidgets.QWidget)
         super(AssetLoader, self).__init__(prnt)
 
         # Common Preferences (common preferences on all illogic tools)
@@ -46,8 +143,29 @@ class AssetLoader(QtWidgets.QDialog):
         # Model attributes
         self.__standins = {}
         self.__sel_standins = []
+        # Selected standins grouped by asset, variant and version
+        self.__sel_groups = []
+        self.__group_instances = False
+        # Polling is slower but sees the publishes made by other NFS clients
+        self.__publish_watcher_polling = False
+        # Standins using the same Maya file share one reference when converted
+        self.__convert_to_maya_instances = True
+        # Manifest of the publishes synced locally (the versions are resolved without accessing the filesystem)
+        self.__publish_manifest = None
+        # Warm the versions in the background when a scene is opened
+        self.__prefetch_on_scene_open = False
+        # Instrumentation of the operations (exported when the tool is closed)
+        self.__profiling = False
+        self.__profiling_dir = tempfile.gettempdir()
         self.__variants_and_versions_enabled = False
         self.__standing_table_refresh_select = True
+        self.__selection_generation = 0
+        # Conversion to Maya running by chunks
+        self.__convert_job = None
+        # Whether the dialog is hidden instead of deleted when closed
+        self.__persistent = persistent
+        self.__hidden = False
+        self.__scene_callbacks = []
 
         # UI attributes
         self.__ui_width = 850
@@ -57,15 +175,30 @@ class AssetLoader(QtWidgets.QDialog):
         self.__ui_pos = QDesktopWidget().availableGeometry().center() - QPoint(self.__ui_width,self.__ui_height)/2
 
         self.__retrieve_prefs()
+        Profiler.get_instance().set_enabled(self.__profiling)
 
         # name the window
         self.setWindowTitle("Asset Loader")
         # make the window a "tool" in Maya's eyes so that it stays on top when you click off
         self.setWindowFlags(QtCore.Qt.Tool)
         # Makes the object get deleted from memory, not just hidden, when it is closed.
-        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
-
-        # retrieve datas
+        if not self.__persistent:
+            self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+
+        # Warm the versions of the scenes opened from now on
+        scene_prefetcher = ScenePrefetcher.get_instance()
+        if self.__prefetch_on_scene_open:
+            scene_prefetcher.install()
+
+        # retrieve datas (the listings of a previous session of the tool are revalidated with their mtime)
+        self.__version_index = VersionIndex.get_instance()
+        if self.__version_index.get_cache() is None:
+            self.__version_index.set_cache(VersionCache())
+        self.__load_publish_manifest()
+        # The listings warmed at the opening of the scene are fresh, and the warm-up still running is joined by the
+        # retrieval of the standins. Otherwise the directories that have changed are listed again in the background
+        check_changed_dirs = not scene_prefetcher.take_warmed() and not scene_prefetcher.is_running()
+        self.__standin_inventory = StandinInventory()
         self.__retrieve_standins()
 
         # Create the layout, linking it to actions and refresh the display
@@ -73,6 +206,9 @@ class AssetLoader(QtWidgets.QDialog):
         self.__refresh_ui()
         self.__select_all_standin()
         self.__create_callback()
+        self.__create_scene_callbacks()
+        if check_changed_dirs:
+            self.__find_changed_dirs()
 
     def __save_prefs(self):
         """
@@ -83,6 +219,7 @@ class AssetLoader(QtWidgets.QDialog):
         self.__prefs["window_size"] = {"width": size.width(), "height": size.height()}
         pos = self.pos()
         self.__prefs["window_pos"] = {"x": pos.x(), "y": pos.y()}
+        self.__prefs["group_instances"] = self.__group_instances
 
     def __retrieve_prefs(self):
         """
@@ -98,31 +235,248 @@ class AssetLoader(QtWidgets.QDialog):
             pos = self.__prefs["window_pos"]
             self.__ui_pos = QPoint(pos["x"],pos["y"])
 
+        if "group_instances" in self.__prefs:
+            self.__group_instances = self.__prefs["group_instances"]
+
+        if "publish_watcher_polling" in self.__prefs:
+            self.__publish_watcher_polling = self.__prefs["publish_watcher_polling"]
+
+        if "convert_to_maya_instances" in self.__prefs:
+            self.__convert_to_maya_instances = self.__prefs["convert_to_maya_instances"]
+
+        if "publish_manifest" in self.__prefs:
+            self.__publish_manifest = self.__prefs["publish_manifest"]
+
+        if "prefetch_on_scene_open" in self.__prefs:
+            self.__prefetch_on_scene_open = self.__prefs["prefetch_on_scene_open"]
+
+        if "profiling" in self.__prefs:
+            self.__profiling = self.__prefs["profiling"]
+        if "profiling_dir" in self.__prefs:
+            self.__profiling_dir = self.__prefs["profiling_dir"]
+
+    def __load_publish_manifest(self):
+        """
+        Resolve the versions from the publish manifest if there is one. The directories absent from the manifest are
+        listed on the filesystem
+        :return:
+        """
+        if self.__publish_manifest is None or isinstance(self.__version_index.get_backend(), ManifestBackend):
+            return
+        try:
+            backend = ManifestBackend(self.__publish_manifest, MemoizedBackend(FileSystemBackend()))
+        except (OSError, ValueError, sqlite3.Error) as e:
+            pm.warning("Publish manifest " + self.__publish_manifest + " not loaded : " + str(e))
+            return
+        self.__version_index.set_backend(backend)
+
     def __create_callback(self):
         """
-        Create callbacks
+        Create the objects behind the callbacks (added when the dialog is shown)
         :return:
         """
+        self.__selection_timer = QTimer(self)
+        self.__selection_timer.setSingleShot(True)
+        self.__selection_timer.setInterval(_SELECTION_DELAY_MS)
+        self.__selection_timer.timeout.connect(self.__on_selection_settled)
+        self.__selection_callback = None
+        # Created on the first show (inotify setup)
+        self.__publish_watcher = None
+
+    def __get_publish_watcher(self):
+        """
+        Getter of the watcher of the publish directories, created on the first use
+        :return: publish watcher
+        """
+        if self.__publish_watcher is None:
+            from .PublishWatcher import PublishWatcher
+            self.__publish_watcher = PublishWatcher(use_inotify=not self.__publish_watcher_polling, parent=self)
+            self.__publish_watcher.directories_changed.connect(self.__on_publish_changed)
+        return self.__publish_watcher
+
+    def __create_scene_callbacks(self):
+        """
+        Create the callbacks telling the dialog that the scene has been replaced
+        :return:
+        """
+        if len(self.__scene_callbacks) > 0:
+            return
+        self.__scene_callbacks = [
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kBeforeNew, self.__on_scene_replaced),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kBeforeOpen, self.__on_scene_replaced),
+        ]
+
+    def __remove_scene_callbacks(self):
+        """
+        Remove the scene callbacks
+        :return:
+        """
+        for callback_id in self.__scene_callbacks:
+            OpenMaya.MMessage.removeCallback(callback_id)
+        self.__scene_callbacks = []
+
+    def __on_scene_replaced(self, *args):
+        """
+        On scene replaced the standins retrieved are not valid anymore (their nodes belong to the previous scene)
+        :return:
+        """
+        self.__standins = {}
+        self.__sel_standins = []
+        self.__sel_groups = []
+
+    def showEvent(self, arg__1: QtGui.QShowEvent) -> None:
+        """
+        Add callbacks and, if the dialog is shown again, retrieve the standins of the current selection
+        :return:
+        """
+        super(AssetLoader, self).showEvent(arg__1)
         self.__selection_callback = \
             OpenMaya.MEventMessage.addEventCallback("SelectionChanged", self.__scene_selection_changed)
+        self.__standin_inventory.add_callbacks()
+        self.__create_scene_callbacks()
+        self.__get_publish_watcher().start()
+        if self.__hidden:
+            self.__hidden = False
+            self.__reopen()
+        else:
+            self.__refresh_watched_directories()
+
+    @Profiler.profiled("reopen")
+    def __reopen(self):
+        """
+        Retrieve the standins of the current selection, reusing the ones already parsed if the scene is the same.
+        The directories that have changed while the dialog was hidden are listed again in the background
+        :return:
+        """
+        self.__apply_selection()
+        self.__find_changed_dirs()
+
+    def __find_changed_dirs(self):
+        """
+        Find in a worker thread the directories listed that have changed since and list them again
+        :return:
+        """
+        changed_dirs_finder = _ChangedDirsFinder(self.__version_index)
+        changed_dirs_finder.signals.found.connect(self.__on_publish_changed)
+        QThreadPool.globalInstance().start(changed_dirs_finder)
 
     def hideEvent(self, arg__1: QtGui.QCloseEvent) -> None:
         """
         Remove callbacks
         :return:
         """
-        OpenMaya.MMessage.removeCallback(self.__selection_callback)
+        if self.__selection_callback is not None:
+            OpenMaya.MMessage.removeCallback(self.__selection_callback)
+            self.__selection_callback = None
+        self.__standin_inventory.remove_callbacks()
+        # The dialog kept alive still has to know that the scene has been replaced
+        if not self.__persistent:
+            self.__remove_scene_callbacks()
+        self.__selection_timer.stop()
+        if self.__publish_watcher is not None:
+            self.__publish_watcher.stop()
+        # Ignore the parsing still running
+        self.__selection_generation += 1
+        self.__hidden = True
         self.__save_prefs()
+        self.__version_index.save()
+        self.__export_profiling()
+
+    def __export_profiling(self):
+        """
+        Export the stats and the Chrome trace of the operations if the profiling is enabled
+        :return:
+        """
+        profiler = Profiler.get_instance()
+        if not profiler.is_enabled():
+            return
+        basename = os.path.join(self.__profiling_dir, "asset_loader_" + time.strftime("%Y%m%d_%H%M%S"))
+        profiler.export_json(basename + ".stats.json")
+        profiler.export_chrome_trace(basename + ".trace.json")
+        profiler.clear()
+        pm.displayInfo("Asset Loader : profiling exported to " + basename + ".stats.json and " + basename +
+                       ".trace.json")
 
     def __scene_selection_changed(self, *args, **kwargs):
         """
-        On scene changed we want to retrieve the standins selected and refresh the ui
+        On scene changed we wait for the selection to settle before retrieving the standins
+        :return:
+        """
+        # The selection is changed by the conversion itself
+        if self.__convert_job is not None:
+            return
+        self.__selection_timer.start()
+
+    def __on_selection_settled(self):
+        """
+        When the selection has settled the publish directories of the new standins are listed in a worker thread
+        :return:
+        """
+        self.__selection_generation += 1
+        standin_dsos, _ = self.__retrieve_standin_dsos()
+        dsos = [dso for name, dso in standin_dsos.items() if name not in self.__standins]
+        if len(dsos) == 0:
+            self.__apply_selection()
+            return
+        warmer = _VersionIndexWarmer(self.__version_index, dsos, self.__selection_generation)
+        warmer.signals.finished.connect(self.__on_versions_warmed)
+        QThreadPool.globalInstance().start(warmer)
+
+    def __on_versions_warmed(self, generation):
+        """
+        Once the publish directories are listed retrieve the standins and refresh the ui in the main thread
+        :param generation: generation of the selection
+        :return:
+        """
+        # A newer selection is being loaded
+        if generation != self.__selection_generation:
+            return
+        self.__apply_selection()
+
+    def __apply_selection(self):
+        """
+        Retrieve the standins selected and refresh the ui
         :return:
         """
         self.__retrieve_standins()
         self.__refresh_standin_table()
         self.__select_all_standin()
         self.__on_standin_select_changed()
+        self.__refresh_watched_directories()
+
+    def __refresh_watched_directories(self):
+        """
+        Watch the publish directories and the variant directories of the standins retrieved, and the versions found
+        incomplete
+        :return:
+        """
+        # Not shown yet, the directories are watched on the first show
+        if self.__publish_watcher is None:
+            return
+        directories = set()
+        for standin in self.__standins.values():
+            publish_ass_dir = standin.get_publish_ass_dir()
+            directories.add(publish_ass_dir)
+            for variant in standin.get_versions().keys():
+                directories.add(publish_ass_dir + "/" + standin.get_standin_name() + "_" + variant)
+        # The versions still being published are watched until they are complete
+        directories.update(self.__version_index.get_pending_dirs())
+        self.__publish_watcher.set_directories(directories)
+
+    def __on_publish_changed(self, directories):
+        """
+        On publish directories changed update the versions of the assets concerned and their rows
+        :param directories
+        :return:
+        """
+        assets_updated = self.__version_index.refresh_dirs(directories)
+        if len(assets_updated) == 0:
+            return
+        standin_names = set(standin_name for publish_ass_dir, standin_name in assets_updated)
+        standins_updated = [standin for standin in self.__standins.values()
+                            if standin.get_standin_name() in standin_names]
+        self.__refresh_ui(standins_updated)
+        self.__refresh_watched_directories()
 
     @staticmethod
     def __test_trsf_has_standin(trsf):
@@ -137,42 +491,23 @@ class AssetLoader(QtWidgets.QDialog):
                 return True
         return False
 
+    def __retrieve_standin_dsos(self):
+        """
+        Retrieve the dso of the standins of the selection or of all the standins if nothing is selected
+        :return: standin name -> dso and whether nothing is selected
+        """
+        standin_dsos, selection_empty = self.__standin_inventory.resolve_selection()
+        if selection_empty:
+            standin_dsos = self.__standin_inventory.get_dsos()
+        return standin_dsos, selection_empty
+
+    @Profiler.profiled("retrieve_standins")
     def __retrieve_standins(self):
         """
-        Retrieve the standins
+        Retrieve the standins. The standins already retrieved are reused instead of being parsed again
         :return:
         """
-        self.__standins.clear()
-
-        selection = pm.ls(selection=True)
-        if len(selection)>0:
-            standins = {}
-            for sel in selection:
-                if pm.objectType(sel, isType="aiStandIn"):
-                    # Standin found
-                    standins[sel.name()] = Standin(sel)
-                elif pm.objectType(sel, isType="transform"):
-                    prt = sel.getParent()
-                    if prt is not None and pm.objectType(prt, isType="transform"):
-                        shape = prt.getShape()
-                        if shape is not None and pm.objectType(shape, isType="aiStandIn"):
-                            # Proxy of Standin found
-                            standins[shape.name()] = Standin(shape)
-
-                for rel in pm.listRelatives(sel, allDescendents=True, type="aiStandIn"):
-                    standins[rel.name()] = Standin(rel)
-
-            for name, standin in standins.items():
-                if standin.is_valid():
-                    self.__standins[name] = standin
-        else:
-            standins = pm.ls(type="aiStandIn")
-            for standin in standins:
-                standin_inst = Standin(standin)
-                if standin_inst.is_valid() and not standin_inst.is_up_to_date():
-                    self.__standins[standin.name()] = standin_inst
-
-        self.__standins = dict(sorted(self.__standins.items()))
+        self.__standins = Standin.retrieve_standins(self.__standin_inventory, self.__standins, self.__version_index)
 
     def __create_ui(self):
         """
@@ -206,15 +541,17 @@ class AssetLoader(QtWidgets.QDialog):
         top_grid_layout.addWidget(right_title, 0, 1)
 
         # ML.1.3 : Table Standins
-        self.__ui_standin_table = QTableWidget(0, 4)
-        self.__ui_standin_table.setHorizontalHeaderLabels(["Name", "Asset", "Variant", "Version"])
+        self.__standin_model = StandinTableModel(self.__asset_path, self)
+        self.__standin_model.set_grouped(self.__group_instances, [])
+        self.__ui_standin_table = QTableView()
+        self.__ui_standin_table.setModel(self.__standin_model)
         self.__ui_standin_table.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Preferred)
         self.__ui_standin_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.__ui_standin_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.__ui_standin_table.verticalHeader().hide()
         self.__ui_standin_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        self.__ui_standin_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.__ui_standin_table.itemSelectionChanged.connect(self.__on_standin_select_changed)
+        self.__ui_standin_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.__ui_standin_table.selectionModel().selectionChanged.connect(self.__on_standin_select_changed)
         top_grid_layout.addWidget(self.__ui_standin_table, 1, 0)
         # ML.1.4 : Content Right layout
         content_right_layout = QVBoxLayout()
@@ -253,6 +590,11 @@ class AssetLoader(QtWidgets.QDialog):
         self.__ui_update_to_last_btn = QPushButton("Update to last")
         self.__ui_update_to_last_btn.clicked.connect(self.__update_to_last)
         btn_left_lyt.addWidget(self.__ui_update_to_last_btn)
+        # ML.1.5.3 : Group instances
+        self.__ui_group_instances_cb = QCheckBox("Group instances")
+        self.__ui_group_instances_cb.setChecked(self.__group_instances)
+        self.__ui_group_instances_cb.stateChanged.connect(self.__on_group_instances_changed)
+        btn_left_lyt.addWidget(self.__ui_group_instances_cb)
         # ML.1.6 : Buttons right layout
         btn_right_lyt = QHBoxLayout()
         top_grid_layout.addLayout(btn_right_lyt, 2, 1)
@@ -286,13 +628,19 @@ class AssetLoader(QtWidgets.QDialog):
         self.__ui_add_transforms.setFixedWidth(180)
         self.__ui_add_transforms.setEnabled(False)  # TODO to implement
         bottom_btn_lyt.addWidget(self.__ui_add_transforms)
+        # ML.3.3 : Stale report
+        self.__ui_stale_report_btn = QPushButton("Stale report")
+        self.__ui_stale_report_btn.setFixedWidth(180)
+        self.__ui_stale_report_btn.clicked.connect(self.__show_stale_report)
+        bottom_btn_lyt.addWidget(self.__ui_stale_report_btn)
 
-    def __refresh_ui(self):
+    def __refresh_ui(self, edited_standins=None):
         """
         Refresh the ui according to the model attribute
+        :param edited_standins: standins whose data have been edited
         :return:
         """
-        self.__refresh_standin_table()
+        self.__refresh_standin_table(edited_standins)
         self.__check_variants_versions_enabled()
         self.__refresh_variants_list()
         self.__refresh_versions_list()
@@ -310,69 +658,31 @@ class AssetLoader(QtWidgets.QDialog):
         Check if the selected standins can be treated as one in the variants and version editor
         :return:
         """
-        self.__variants_and_versions_enabled = False
-        standin_curr = None
-        for standin in self.__sel_standins:
-            if standin_curr is None:
-                standin_curr = standin
-                self.__variants_and_versions_enabled = True
-
-            if standin_curr.get_standin_name() != standin.get_standin_name() \
-                    or standin_curr.get_active_variant() != standin.get_active_variant() \
-                    or standin_curr.get_active_version() != standin.get_active_version():
-                self.__variants_and_versions_enabled = False
-                break
+        self.__sel_groups = StandinGroup.group(self.__sel_standins)
+        self.__variants_and_versions_enabled = len(self.__sel_groups) == 1
 
-    def __refresh_standin_table(self):
+    @Profiler.profiled("refresh_standin_table")
+    def __refresh_standin_table(self, edited_standins=None):
         """
-        Refresh the standins table and their data
+        Refresh the standins table and their data. Only the rows of the standins added or removed are inserted
+        or removed
+        :param edited_standins: standins whose data have been edited
         :return:
         """
         standing_table_refresh_select_prev = self.__standing_table_refresh_select
         self.__standing_table_refresh_select = False
-        self.__ui_standin_table.setRowCount(0)
-        row_index = 0
-        rows_selected = []
-        for standin in self.__standins.values():
-            self.__ui_standin_table.insertRow(row_index)
-            object_name = standin.get_object_name()
-            standin_name = standin.get_standin_name()
 
-            if standin in self.__sel_standins:
-                rows_selected.append(row_index)
+        rows_inserted = self.__standin_model.set_standins(list(self.__standins.values()))
+        if edited_standins is not None:
+            self.__standin_model.refresh_standins(edited_standins)
 
-            active_variant = standin.get_active_variant()
-            active_version = standin.get_active_version()
-
-            if standin.is_up_to_date():
-                version_str = active_version
-                asset_icon = self.__asset_path + "/valid.png"
-            else:
-                version_str = active_version + " -> " + standin.last_version()
-                asset_icon = self.__asset_path + "/warning.png"
-
-            object_name_item = QTableWidgetItem(object_name)
-            object_name_item.setIcon(QIcon(asset_icon))
-            object_name_item.setData(Qt.UserRole, standin)
-            self.__ui_standin_table.setItem(row_index, 0, object_name_item)
-
-            standin_name_item = QTableWidgetItem(standin_name)
-            standin_name_item.setTextAlignment(Qt.AlignCenter)
-            self.__ui_standin_table.setItem(row_index, 1, standin_name_item)
-
-            variant_item = QTableWidgetItem(active_variant)
-            variant_item.setTextAlignment(Qt.AlignCenter)
-            self.__ui_standin_table.setItem(row_index, 2, variant_item)
-
-            version_item = QTableWidgetItem(version_str)
-            version_item.setTextAlignment(Qt.AlignCenter)
-            self.__ui_standin_table.setItem(row_index, 3, version_item)
-            row_index += 1
-
-        self.__ui_standin_table.setSelectionMode(QAbstractItemView.MultiSelection)
-        for row_index in rows_selected:
-            self.__ui_standin_table.selectRow(row_index)
-        self.__ui_standin_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        selection = QItemSelection()
+        sel_standins_set = set(self.__sel_standins)
+        for row_index in rows_inserted:
+            if not sel_standins_set.isdisjoint(self.__standin_model.get_standins_of_row(row_index)):
+                selection.select(self.__standin_model.index(row_index, 0),
+                                 self.__standin_model.index(row_index, self.__standin_model.columnCount() - 1))
+        self.__ui_standin_table.selectionModel().select(selection, QItemSelectionModel.Select)
 
         self.__standing_table_refresh_select = standing_table_refresh_select_prev
 
@@ -411,10 +721,18 @@ class AssetLoader(QtWidgets.QDialog):
                 return
             versions_active_variant = variants_and_versions[selected_variant]
             active_version = standin.get_active_version()
+            # The versions are checked at once
+            statuses = variants_and_versions.get_statuses(selected_variant,
+                                                          [version[0] for version in versions_active_variant])
             select_wg = None
             for version in versions_active_variant:
                 version_list_widget = QListWidgetItem(version[0])
-                if select_wg is None:
+                status = statuses[version[0]]
+                if status is not None and not status.complete:
+                    # Not published or still being written
+                    version_list_widget.setFlags(version_list_widget.flags() & ~Qt.ItemIsEnabled)
+                    version_list_widget.setToolTip("Incomplete version")
+                elif select_wg is None:
                     select_wg = version_list_widget
                 self.__ui_version_list.addItem(version_list_widget)
                 if active_variant == selected_variant and active_version == version[0]:
@@ -441,14 +759,14 @@ class AssetLoader(QtWidgets.QDialog):
         has_hd = False
         up_to_date = False
         set_version = False
-        for standin in self.__sel_standins:
-            if not standin.is_up_to_date():
+        for group in self.__sel_groups:
+            if not group.is_up_to_date():
                 up_to_date = True
-            if standin.has_version_in_sd():
+            if group.has_version_in_sd():
                 has_sd = True
-            if standin.has_version_in_hd():
+            if group.has_version_in_hd():
                 has_hd = True
-            if standin.get_active_version() != version or standin.get_active_variant() != variant:
+            if group.get_active_version() != version or group.get_active_variant() != variant:
                 set_version = True
 
         self.__ui_update_to_last_btn.setEnabled(up_to_date)
@@ -460,7 +778,7 @@ class AssetLoader(QtWidgets.QDialog):
 
         self.__ui_to_maya_btn.setEnabled(many_sel_standin)
 
-    def __on_standin_select_changed(self):
+    def __on_standin_select_changed(self, *args):
         """
         Retrieve the standins selected when the selection in the standing table changes
         :return:
@@ -468,12 +786,25 @@ class AssetLoader(QtWidgets.QDialog):
         if self.__standing_table_refresh_select:
             self.__sel_standins.clear()
             for s in self.__ui_standin_table.selectionModel().selectedRows():
-                self.__sel_standins.append(self.__ui_standin_table.item(s.row(), 0).data(Qt.UserRole))
+                self.__sel_standins.extend(self.__standin_model.get_standins_of_row(s.row()))
             self.__check_variants_versions_enabled()
             self.__refresh_variants_list()
             self.__refresh_versions_list()
             self.__refresh_btn()
 
+    def __on_group_instances_changed(self, state):
+        """
+        On group instances checkbox changed display the identical standins in one row or not
+        :param state
+        :return:
+        """
+        self.__group_instances = state == Qt.Checked
+        standing_table_refresh_select_prev = self.__standing_table_refresh_select
+        self.__standing_table_refresh_select = False
+        self.__standin_model.set_grouped(self.__group_instances, list(self.__standins.values()))
+        self.__standing_table_refresh_select = standing_table_refresh_select_prev
+        self.__select_all_standin()
+
     def __on_variant_selected_changed(self):
         """
         On variant selection changed refresh some fields
@@ -487,14 +818,16 @@ class AssetLoader(QtWidgets.QDialog):
         Select all the standins that are out of dates
         :return:
         """
-        self.__ui_standin_table.clearSelection()
-        self.__ui_standin_table.setSelectionMode(QAbstractItemView.MultiSelection)
-        for i in range(self.__ui_standin_table.rowCount()):
-            standin = self.__ui_standin_table.item(i, 0).data(Qt.UserRole)
-            if not standin.is_up_to_date():
-                self.__ui_standin_table.selectRow(i)
-        self.__ui_standin_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        selection = QItemSelection()
+        last_column = self.__standin_model.columnCount() - 1
+        for row_index, row in enumerate(self.__standin_model.get_rows()):
+            if not row.is_up_to_date():
+                selection.select(self.__standin_model.index(row_index, 0),
+                                 self.__standin_model.index(row_index, last_column))
+        self.__ui_standin_table.selectionModel().select(
+            selection, QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows)
 
+    @Profiler.profiled("set_version")
     def __set_version(self):
         """
         Set the variant and the version selected to the standins selected
@@ -506,45 +839,75 @@ class AssetLoader(QtWidgets.QDialog):
         if len(variant_items) > 0 and len(version_items) > 0:
             version_item = version_items[0]
             variant_item = variant_items[0]
-            for standin in self.__sel_standins:
-                standin.set_active_variant_version(variant_item.text(), version_item.text())
-            self.__refresh_ui()
+            Standin.set_variant_version_all(self.__sel_standins, variant_item.text(), version_item.text())
+            self.__refresh_ui(self.__sel_standins)
 
+    @Profiler.profiled("update_to_last")
     def __update_to_last(self):
         """
         Update all the standins selected versions to the last of their variant
         :return:
         """
-        for standin in self.__sel_standins:
-            standin.update_to_last()
-        self.__refresh_ui()
+        Standin.update_to_last_all(self.__sel_standins)
+        self.__refresh_ui(self.__sel_standins)
 
+    @Profiler.profiled("set_to_sd")
     def __set_to_sd(self):
         """
         Set to an SD variant
         :return:
         """
-        for standin in self.__sel_standins:
-            standin.set_to_sd()
-        self.__refresh_ui()
+        Standin.set_to_sd_all(self.__sel_standins)
+        self.__refresh_ui(self.__sel_standins)
 
+    @Profiler.profiled("set_to_hd")
     def __set_to_hd(self):
         """
         Set to an HD variant
         :return:
         """
-        for standin in self.__sel_standins:
-            standin.set_to_hd()
-        self.__refresh_ui()
+        Standin.set_to_hd_all(self.__sel_standins)
+        self.__refresh_ui(self.__sel_standins)
 
     def __convert_to_maya(self):
         """
-        Convert the standins selected to Maya object
+        Convert the standins selected to Maya object by chunks without freezing Maya
         :return:
         """
+        if self.__convert_job is not None:
+            return
         self.__standing_table_refresh_select = False
-        standins = self.__sel_standins
-        for standin in standins:
-            standin.convert_to_maya()
+        from .ConvertToMayaJob import ConvertToMayaJob
+
+        self.__convert_job = ConvertToMayaJob(self.__sel_standins, self.__convert_to_maya_instances, self)
+        self.__convert_job.finished.connect(self.__on_converted_to_maya)
+        self.__convert_job.start()
+
+    def __on_converted_to_maya(self, standins_failed, cancelled):
+        """
+        Once the conversion is finished or cancelled refresh the ui with the standins converted
+        :param standins_failed: standins not converted
+        :param cancelled: whether the conversion has been cancelled
+        :return:
+        """
+        standins = self.__convert_job.get_standins()
+        self.__convert_job.deleteLater()
+        self.__convert_job = None
+        if len(standins_failed) > 0:
+            pm.warning("Asset Loader : not converted to Maya (no Maya file or conversion failed) : " +
+                       ", ".join(standin.get_object_name() for standin in standins_failed))
+        if cancelled:
+            pm.displayInfo("Asset Loader : conversion to Maya cancelled")
         self.__standing_table_refresh_select = True
-        self.__refresh_ui()
+        self.__refresh_ui(standins)
+
+    @Profiler.profiled("stale_report")
+    def __show_stale_report(self):
+        """
+        Show the stale standins of the whole scene by asset, by variant and by version gap
+        :return:
+        """
+        from .StaleReportDialog import StaleReportDialog
+
+        summary = StaleReport.from_scene(self.__version_index).get_summary()
+        StaleReportDialog(summary, self).show()
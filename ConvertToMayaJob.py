@@ -0,0 +1,217 @@
+import time
+from collections import deque
+
+import pymel.core as pm
+
+from PySide2.QtWidgets import *
+from PySide2.QtCore import *
+
+from .Standin import *
+from .Profiler import *
+
+# ######################################################################################################################
+
+# Time spent converting in each chunk before giving the hand back to Maya
+_CHUNK_BUDGET_S = 0.05
+# Standins of a same maya file converted together at most
+_MAX_STANDINS_PER_ITEM = 50
+
+
+# ######################################################################################################################
+
+class _MayaFilesCheckerSignals(QObject):
+    finished = Signal(object)
+
+
+class _MayaFilesChecker(QRunnable):
+    def __init__(self, maya_paths):
+        """
+        Constructor
+        :param maya_paths
+        """
+        super(_MayaFilesChecker, self).__init__()
+        self.signals = _MayaFilesCheckerSignals()
+        self.__maya_paths = maya_paths
+
+    def run(self):
+        """
+        Check the maya files in a worker thread
+        :return:
+        """
+        maya_paths_exist = {}
+        try:
+            maya_paths_exist = VersionIndex.get_instance().exists_all(self.__maya_paths)
+        finally:
+            self.signals.finished.emit(maya_paths_exist)
+
+
+# ######################################################################################################################
+
+class ConvertToMayaJob(QObject):
+    """
+    Conversion of many standins to maya objects without freezing Maya. The maya files are checked in a worker thread
+    then the standins are converted by chunks on the main thread, each chunk being its own undo chunk. A cancellation
+    stops between two chunks so every standin is either converted or untouched
+    """
+    # Standins not converted (maya file missing or conversion failed) and whether the job has been cancelled
+    finished = Signal(list, bool)
+
+    def __init__(self, standins, instance=True, parent=None):
+        """
+        Constructor
+        :param standins
+        :param instance: whether the standins using the same maya file share one reference
+        :param parent
+        """
+        super(ConvertToMayaJob, self).__init__(parent)
+        self.__standins = list(standins)
+        self.__instance = instance
+        self.__standins_by_maya_path = Standin.group_by_maya_path(self.__standins)
+        # (maya path, standins) to convert
+        self.__queue = deque()
+        # Maya path -> root node of its reference (reused by the next chunks)
+        self.__roots = {}
+        self.__standins_failed = []
+        self.__nb_done = 0
+        self.__convert_start = None
+        self.__cancelled = False
+        self.__running = False
+        self.__progress = None
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(0)
+        self.__timer.timeout.connect(self.__process_chunk)
+
+    def get_standins(self):
+        """
+        Getter of the standins to convert
+        :return: standins
+        """
+        return self.__standins
+
+    def is_running(self):
+        """
+        Getter of whether the job is running
+        :return: is running
+        """
+        return self.__running
+
+    def start(self):
+        """
+        Start the job : check the maya files in a worker thread
+        :return:
+        """
+        self.__running = True
+        self.__progress = QProgressDialog("Checking the Maya files...", "Cancel", 0, len(self.__standins),
+                                          self.parent())
+        self.__progress.setWindowTitle("Convert to Maya")
+        # The scene must not be edited between two chunks
+        self.__progress.setWindowModality(Qt.ApplicationModal)
+        self.__progress.setMinimumDuration(0)
+        self.__progress.setAutoClose(False)
+        self.__progress.setAutoReset(False)
+        self.__progress.canceled.connect(self.cancel)
+        self.__progress.setValue(0)
+        checker = _MayaFilesChecker(list(self.__standins_by_maya_path.keys()))
+        checker.signals.finished.connect(self.__on_maya_files_checked)
+        QThreadPool.globalInstance().start(checker)
+
+    def cancel(self):
+        """
+        Cancel the job after the chunk running
+        :return:
+        """
+        self.__cancelled = True
+
+    def __on_maya_files_checked(self, maya_paths_exist):
+        """
+        Once the maya files are checked convert the standins by chunks
+        :param maya_paths_exist: maya path -> exists
+        :return:
+        """
+        for maya_path, standins in self.__standins_by_maya_path.items():
+            if not maya_paths_exist.get(maya_path, False):
+                self.__standins_failed.extend(standins)
+                self.__nb_done += len(standins)
+                continue
+            for index in range(0, len(standins), _MAX_STANDINS_PER_ITEM):
+                self.__queue.append((maya_path, standins[index:index + _MAX_STANDINS_PER_ITEM]))
+        self.__convert_start = time.perf_counter()
+        self.__update_progress(0)
+        self.__timer.start()
+
+    def __process_chunk(self):
+        """
+        Convert standins until the time budget of the chunk is spent, in one undo chunk
+        :return:
+        """
+        if self.__cancelled or len(self.__queue) == 0:
+            self.__finish()
+            return
+        try:
+            nb_converted = self.__convert_chunk()
+            self.__update_progress(nb_converted)
+        except Exception as e:
+            # The job must end whatever happens, the dialog waits for it
+            pm.warning("Asset Loader : conversion to Maya stopped : " + str(e))
+            self.__finish()
+            return
+        self.__timer.start()
+
+    def __convert_chunk(self):
+        """
+        Convert the items of the queue until the time budget is spent. The standins of an item that fails are
+        recorded as failed, the nodes created for them being removed
+        :return: number of standins converted
+        """
+        chunk_start = time.perf_counter()
+        nb_converted = 0
+        with Profiler.get_instance().timed("convert_to_maya_chunk", queued=len(self.__queue)):
+            pm.undoInfo(openChunk=True, chunkName="Asset Loader Convert")
+            pm.refresh(suspend=True)
+            try:
+                while len(self.__queue) > 0 and time.perf_counter() - chunk_start < _CHUNK_BUDGET_S:
+                    maya_path, standins = self.__queue.popleft()
+                    try:
+                        self.__roots[maya_path] = Standin.convert_maya_file_to_maya(
+                            maya_path, standins, self.__instance, self.__roots.get(maya_path))
+                        nb_converted += len(standins)
+                    except Exception as e:
+                        pm.warning("Asset Loader : conversion of " + maya_path + " failed : " + str(e))
+                        self.__standins_failed.extend(standins)
+                    self.__nb_done += len(standins)
+            finally:
+                pm.refresh(suspend=False)
+                pm.undoInfo(closeChunk=True)
+        return nb_converted
+
+    def __update_progress(self, nb_converted):
+        """
+        Update the progress and the estimated time left
+        :param nb_converted: number of standins converted by the last chunk
+        :return:
+        """
+        nb_standins = len(self.__standins)
+        nb_left = nb_standins - self.__nb_done
+        label = "Converting %d / %d standins" % (self.__nb_done, nb_standins)
+        elapsed = time.perf_counter() - self.__convert_start
+        nb_converted_total = self.__nb_done - len(self.__standins_failed)
+        if nb_converted > 0 and nb_converted_total > 0 and nb_left > 0:
+            label += " (about %ds left)" % round(elapsed / nb_converted_total * nb_left)
+        self.__progress.setLabelText(label)
+        self.__progress.setValue(self.__nb_done)
+
+    def __finish(self):
+        """
+        Close the progress and notify the end of the job
+        :return:
+        """
+        self.__running = False
+        self.__timer.stop()
+        try:
+            self.__progress.canceled.disconnect(self.cancel)
+            self.__progress.close()
+            self.__progress.deleteLater()
+        finally:
+            self.__progress = None
+            self.finished.emit(self.__standins_failed, self.__cancelled)
@@ -0,0 +1,190 @@
+"""
+Scanner of Maya ASCII scenes : read the dso of the standins directly in the .ma files (without Maya) and check
+if they are up to date.
+
+    python -m asset_loader.MaScanner shot_010.ma shot_020.ma --report report.json
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+
+from .VersionIndex import *
+
+# ######################################################################################################################
+
+_STANDIN_TYPE = "aiStandIn"
+# Strings or words, the parentheses around the strings concatenated by Maya are separators
+_TOKEN_REGEX = re.compile(r'"((?:[^"\\]|\\.)*)"|([^\s;()"]+)')
+
+
+# ######################################################################################################################
+
+class MaScanner:
+    """
+    Read the standins of .ma files line by line so big scenes don't have to be loaded in memory
+    """
+
+    def __init__(self, version_index=None):
+        """
+        Constructor
+        :param version_index: version index used to find the last versions
+        """
+        self.__version_index = version_index if version_index is not None else VersionIndex.get_instance()
+
+    @staticmethod
+    def __tokenize(statement):
+        """
+        Split a MEL statement in tokens. The strings concatenated with + are merged, Maya writes the long ones as
+        ("part1" + "part2")
+        :param statement
+        :return: tokens
+        """
+        tokens = []
+        concat = False
+        for match in _TOKEN_REGEX.finditer(statement):
+            string, word = match.groups()
+            if string is not None:
+                string = string.replace('\\"', '"').replace("\\\\", "\\")
+                if concat and len(tokens) > 0:
+                    tokens[-1] += string
+                else:
+                    tokens.append(string)
+                concat = False
+            elif word == "+":
+                concat = True
+            else:
+                tokens.append(word)
+                concat = False
+        return tokens
+
+    @staticmethod
+    def __get_flag(tokens, flag):
+        """
+        Get the value of a flag in the tokens of a statement
+        :param tokens
+        :param flag
+        :return: value
+        """
+        if flag in tokens:
+            index = tokens.index(flag)
+            if index + 1 < len(tokens):
+                return tokens[index + 1]
+        return None
+
+    @staticmethod
+    def parse_standins(scene_path):
+        """
+        Retrieve the standins of a .ma file and their dso
+        :param scene_path
+        :return: list of dict with node, parent and dso
+        """
+        standins = {}
+        current_standin = None
+        statement = None
+        with open(scene_path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if statement is not None:
+                    # Continuation of a dso statement
+                    statement += line
+                else:
+                    stripped = line.lstrip()
+                    if stripped.startswith("createNode "):
+                        tokens = MaScanner.__tokenize(stripped)
+                        current_standin = None
+                        if len(tokens) > 1 and tokens[1] == _STANDIN_TYPE:
+                            current_standin = MaScanner.__get_flag(tokens, "-n")
+                            standins[current_standin] = {
+                                "node": current_standin,
+                                "parent": MaScanner.__get_flag(tokens, "-p"),
+                                "dso": None}
+                        continue
+                    # Only the setAttr of the dso are interesting (the other attributes are skipped without parsing)
+                    if not stripped.startswith("setAttr ") or "dso\"" not in stripped:
+                        if not line.startswith("\t"):
+                            current_standin = None
+                        continue
+                    statement = stripped
+                if not statement.rstrip().endswith(";"):
+                    continue
+
+                tokens = MaScanner.__tokenize(statement)
+                statement = None
+                if len(tokens) < 2 or tokens[-2] != "string":
+                    continue
+                attribute = tokens[1]
+                if attribute == ".dso":
+                    node = current_standin
+                elif attribute.endswith(".dso"):
+                    node = attribute[:-len(".dso")]
+                else:
+                    continue
+                if node is None:
+                    continue
+                if node not in standins:
+                    # Standin created in a reference and edited in this scene
+                    standins[node] = {"node": node, "parent": None, "dso": None}
+                standins[node]["dso"] = tokens[-1]
+        return list(standins.values())
+
+    def scan(self, scene_path):
+        """
+        Check if the standins of a .ma file are up to date
+        :param scene_path
+        :return: report of the scene
+        """
+        start = time.time()
+        report = {"scene": scene_path, "status": "ok", "standins": [], "out_of_date": 0}
+        try:
+            for standin in MaScanner.parse_standins(scene_path):
+                layout = VersionIndex.split_dso(standin["dso"])
+                standin["valid"] = layout is not None
+                if layout is not None:
+                    publish_ass_dir, variant_dir_name, version = layout
+                    last_version = self.__version_index.last_version(publish_ass_dir, variant_dir_name)
+                    standin["variant_dir"] = variant_dir_name
+                    standin["version"] = version
+                    standin["last_version"] = last_version
+                    standin["up_to_date"] = last_version is None or last_version == version
+                    if not standin["up_to_date"]:
+                        report["out_of_date"] += 1
+                report["standins"].append(standin)
+        except OSError as e:
+            report["status"] = "error"
+            report["error"] = str(e)
+        report["time"] = time.time() - start
+        return report
+
+
+# ######################################################################################################################
+
+def main(argv=None):
+    """
+    Entry point of the command line
+    :param argv
+    :return: exit code (1 if a standin is out of date)
+    """
+    parser = argparse.ArgumentParser(description="Check the standins of .ma files without Maya")
+    parser.add_argument("scenes", nargs="+", help=".ma files")
+    parser.add_argument("--report", default="-", help="path of the JSON report (- for stdout)")
+    parser.add_argument("--manifest", default=None, help="publish manifest used to resolve the versions")
+    args = parser.parse_args(argv)
+
+    if args.manifest is not None:
+        VersionIndex.get_instance().set_backend(ManifestBackend(args.manifest, MemoizedBackend(FileSystemBackend())))
+    scanner = MaScanner()
+    reports = [scanner.scan(scene_path) for scene_path in args.scenes]
+
+    if args.report == "-":
+        json.dump(reports, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0 if all(report["status"] == "ok" and report["out_of_date"] == 0 for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ######################################################################################################################
+
+class Profiler:
+    """
+    Process-wide recorder of the wall time of the Asset Loader operations and of the filesystem accesses.
+    Exportable as JSON stats or as Chrome trace (chrome://tracing, Perfetto)
+    """
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        """
+        Getter of the process-wide instance
+        :return: instance
+        """
+        if Profiler.__instance is None:
+            Profiler.__instance = Profiler()
+        return Profiler.__instance
+
+    @staticmethod
+    def profiled(name):
+        """
+        Decorator recording the wall time of a function when the profiler is enabled
+        :param name: name of the operation
+        :return: decorator
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                profiler = Profiler.get_instance()
+                if not profiler.is_enabled():
+                    return func(*args, **kwargs)
+                with profiler.timed(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.__enabled = False
+        self.__lock = threading.Lock()
+        self.__origin = time.perf_counter()
+        # (name, start, duration, thread id, args)
+        self.__events = []
+        # counter name -> key -> count
+        self.__counters = {}
+
+    def is_enabled(self):
+        """
+        Getter of whether the profiler records
+        :return: is enabled
+        """
+        return self.__enabled
+
+    def set_enabled(self, enabled):
+        """
+        Setter of whether the profiler records
+        :param enabled
+        :return:
+        """
+        self.__enabled = enabled
+
+    @contextmanager
+    def timed(self, name, **args):
+        """
+        Record the wall time of a block
+        :param name: name of the operation
+        :param args: details of the operation (directory, number of standins...)
+        :return:
+        """
+        if not self.__enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            with self.__lock:
+                self.__events.append((name, start - self.__origin, duration, threading.get_ident(), args))
+
+    def count(self, name, key=""):
+        """
+        Increment a counter (filesystem operations...)
+        :param name: name of the counter
+        :param key: detail of the counter (directory...)
+        :return:
+        """
+        if not self.__enabled:
+            return
+        with self.__lock:
+            counter = self.__counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0) + 1
+
+    def clear(self):
+        """
+        Forget everything recorded
+        :return:
+        """
+        with self.__lock:
+            self.__events = []
+            self.__counters = {}
+            self.__origin = time.perf_counter()
+
+    def get_stats(self):
+        """
+        Getter of the stats by operation (calls, total and max wall time) and of the counters
+        :return: stats
+        """
+        with self.__lock:
+            events = list(self.__events)
+            counters = {name: dict(counter) for name, counter in self.__counters.items()}
+        timers = {}
+        for name, start, duration, thread_id, args in events:
+            timer = timers.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0})
+            timer["calls"] += 1
+            timer["total"] += duration
+            timer["max"] = max(timer["max"], duration)
+        return {
+            "timers": timers,
+            "counters": {name: {"total": sum(counter.values()), "by_key": counter}
+                         for name, counter in counters.items()}
+        }
+
+    def export_json(self, path):
+        """
+        Export the stats in a JSON file
+        :param path
+        :return:
+        """
+        with open(path, "w") as f:
+            json.dump(self.get_stats(), f, indent=2)
+
+    def export_chrome_trace(self, path):
+        """
+        Export the events in the Chrome trace format
+        :param path
+        :return:
+        """
+        pid = os.getpid()
+        with self.__lock:
+            events = list(self.__events)
+        trace_events = [{
+            "name": name,
+            "cat": "asset_loader",
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": pid,
+            "tid": thread_id,
+            "args": {key: str(value) for key, value in args.items()}
+        } for name, start, duration, thread_id, args in events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms",
+                       "otherData": {"counters": self.get_stats()["counters"]}}, f)
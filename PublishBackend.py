@@ -0,0 +1,696 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .Profiler import *
+
+# ######################################################################################################################
+
+_ASS_EXTENSION = ".ass"
+_MA_EXTENSION = ".ma"
+# Files written next to an .ass that is still being published
+_PENDING_EXTENSIONS = (".tmp", ".part", ".lock")
+# Number of threads checking files on the filesystem
+_EXISTS_WORKERS = 8
+
+# Version of the format of the publish manifests
+MANIFEST_FORMAT = 1
+
+# Files of a version : size of the .ass (-1 if missing), presence of the .ma and whether the .ass is complete
+VersionStatus = namedtuple("VersionStatus", ("ass_size", "has_ma", "complete"))
+
+_MISSING_STATUS = VersionStatus(-1, False, False)
+
+
+def _split_version_file(path):
+    """
+    Split the path of a file of a version at format <variant_dir>/<version>/<asset>_<variant>.<ass|ma>
+    :param path
+    :return: version dir, file base and extension or None if the path doesn't match the layout
+    """
+    version_dir, filename = os.path.split(path.replace("\\", "/"))
+    file_base, ext = os.path.splitext(filename)
+    if ext not in (_ASS_EXTENSION, _MA_EXTENSION) or os.path.basename(os.path.dirname(version_dir)) != file_base:
+        return None
+    return version_dir, file_base, ext
+
+
+def _exists_from_status(status, ext):
+    """
+    Whether a file of a version exists according to the status of the version
+    :param status
+    :param ext: extension of the file
+    :return: exists
+    """
+    return status.ass_size >= 0 if ext == _ASS_EXTENSION else status.has_ma
+
+
+# Levels of detail of the variants (<tag> in the variant names) from the most detailed
+LOD_TIERS = ("HD", "SD", "LD", "PROXY")
+
+
+def get_lod_pairs(variants, tiers=LOD_TIERS):
+    """
+    Pair the variants of the levels of detail (<name>HD <-> <name>SD <-> <name>LD ...)
+    :param variants: variants or variant dir names
+    :param tiers: levels of detail
+    :return: variant -> {level of detail : counterpart variant}
+    """
+    variants_set = set(variants)
+    pairs = {}
+    for variant in sorted(variants_set):
+        for new_v in tiers:
+            # Already at this level of detail
+            if new_v in variant:
+                continue
+            for old_v in tiers:
+                if old_v == new_v or old_v not in variant:
+                    continue
+                counterpart = variant.replace(old_v, new_v)
+                if counterpart in variants_set:
+                    pairs.setdefault(variant, {})[new_v] = counterpart
+                    break
+    return pairs
+
+
+# ######################################################################################################################
+
+class PublishBackend(ABC):
+    """
+    Storage of the publishes seen by the VersionIndex : list the variants of a publish directory, list the versions
+    of a variant directory and tell which files of a version exist. The calls are serialized by the VersionIndex
+    except the listings, the statuses and the checks of the files, that must be safe to do from several threads at
+    once
+    """
+
+    @abstractmethod
+    def list_variants(self, publish_ass_dir):
+        """
+        List the variant directories of a publish directory
+        :param publish_ass_dir
+        :return: sorted variant directory names
+        """
+        pass
+
+    @abstractmethod
+    def list_versions(self, variant_dir):
+        """
+        List the versions of a variant directory
+        :param variant_dir
+        :return: sorted versions
+        """
+        pass
+
+    @abstractmethod
+    def get_version_status(self, version_dir, file_base):
+        """
+        Getter of the files of a version directory
+        :param version_dir
+        :param file_base: <asset>_<variant>
+        :return: VersionStatus
+        """
+        pass
+
+    def get_version_statuses(self, version_dirs):
+        """
+        Getter of the files of many version directories
+        :param version_dirs: list of (version dir, file base)
+        :return: version dir -> VersionStatus
+        """
+        return {version_dir: self.get_version_status(version_dir, file_base) for version_dir, file_base in version_dirs}
+
+    @abstractmethod
+    def exists_all(self, paths):
+        """
+        Check whether files exist
+        :param paths
+        :return: path -> exists
+        """
+        pass
+
+    def get_mtime(self, path):
+        """
+        Getter of the mtime of a directory (can be called without the VersionIndex being locked)
+        :param path
+        :return: mtime or None if unknown
+        """
+        return None
+
+    def get_listed_mtimes(self):
+        """
+        Getter of the mtimes of the directories listed, to find the ones that have changed since
+        :return: directory -> mtime when listed
+        """
+        return {}
+
+    def get_pending_dirs(self):
+        """
+        Getter of the version directories found incomplete, to watch until they are refreshed
+        :return: version directories
+        """
+        return []
+
+    def set_cache(self, cache):
+        """
+        Setter of the persistent cache of the listings (VersionCache)
+        :param cache
+        :return:
+        """
+        pass
+
+    def refresh(self, dirs):
+        """
+        Forget what is known about directories that have changed
+        :param dirs
+        :return:
+        """
+        pass
+
+    def clear(self):
+        """
+        Forget what is known for the session
+        :return:
+        """
+        pass
+
+
+# ######################################################################################################################
+
+class FileSystemBackend(PublishBackend):
+    """
+    Direct access to the publish directories on a mounted filesystem
+    """
+
+    @staticmethod
+    def __list_dirs(path):
+        """
+        List the sub directories of a directory
+        :param path
+        :return: sorted sub directories names
+        """
+        profiler = Profiler.get_instance()
+        profiler.count("scandir", path)
+        try:
+            with profiler.timed("scandir", path=path), os.scandir(path) as it:
+                return sorted(sys.intern(entry.name) for entry in it if entry.is_dir())
+        except OSError:
+            return []
+
+    def list_variants(self, publish_ass_dir):
+        return FileSystemBackend.__list_dirs(publish_ass_dir)
+
+    def list_versions(self, variant_dir):
+        return FileSystemBackend.__list_dirs(variant_dir)
+
+    def get_version_status(self, version_dir, file_base):
+        """
+        List a version directory to know its files in one access (the .ass is the only one stat)
+        :param version_dir
+        :param file_base: <asset>_<variant>
+        :return: VersionStatus
+        """
+        ass_name = file_base + _ASS_EXTENSION
+        ma_name = file_base + _MA_EXTENSION
+        ass_size = -1
+        has_ma = False
+        pending = False
+        Profiler.get_instance().count("scandir", version_dir)
+        try:
+            with os.scandir(version_dir) as it:
+                for entry in it:
+                    if entry.name == ass_name:
+                        ass_size = entry.stat().st_size
+                    elif entry.name == ma_name:
+                        has_ma = True
+                    elif entry.name.endswith(_PENDING_EXTENSIONS):
+                        pending = True
+        except OSError:
+            pass
+        return VersionStatus(ass_size, has_ma, ass_size > 0 and not pending)
+
+    @staticmethod
+    def __is_file(path):
+        """
+        Check whether a file exists
+        :param path
+        :return: exists
+        """
+        Profiler.get_instance().count("isfile", path)
+        return os.path.isfile(path)
+
+    def exists_all(self, paths):
+        """
+        Check whether files exist, in parallel to hide the latency of network filesystems
+        :param paths
+        :return: path -> exists
+        """
+        paths = list(paths)
+        if len(paths) <= 1:
+            return {path: FileSystemBackend.__is_file(path) for path in paths}
+        with ThreadPoolExecutor(max_workers=_EXISTS_WORKERS) as executor:
+            return dict(zip(paths, executor.map(FileSystemBackend.__is_file, paths)))
+
+    def get_mtime(self, path):
+        Profiler.get_instance().count("stat", path)
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+
+# ######################################################################################################################
+
+class MemoizedBackend(PublishBackend):
+    """
+    Layer remembering the answers of a backend for the session. With a persistent cache the listings of the
+    directories whose mtime hasn't changed and the complete versions are reused from a session to another
+    """
+
+    def __init__(self, backend, cache=None):
+        """
+        Constructor
+        :param backend: backend memoized
+        :param cache: persistent cache of the listings (VersionCache)
+        """
+        self.__backend = backend
+        self.__cache = cache
+        # Directory -> sub directories names
+        self.__listings = {}
+        # Directory -> mtime when listed
+        self.__mtimes = {}
+        # Version directory -> VersionStatus
+        self.__statuses = {}
+        # Version directories incomplete (their status is kept until they are refreshed)
+        self.__pending_dirs = set()
+        # Path -> exists
+        self.__exists = {}
+        # The directories are accessed without holding the lock so several threads can list at once
+        self.__lock = threading.Lock()
+        # (kind, directory) -> Future of the thread accessing it (the concurrent requests wait for it)
+        self.__pending = {}
+        # Incremented when the memo is refreshed (the accesses started before are not recorded)
+        self.__generation = 0
+
+    def set_cache(self, cache):
+        with self.__lock:
+            self.__cache = cache
+
+    def __claim(self, key):
+        """
+        Claim the access of a directory, to call holding the lock
+        :param key: (kind, directory)
+        :return: Future of the thread already accessing it (None if claimed) and generation of the memo
+        """
+        if key in self.__pending:
+            return self.__pending[key], self.__generation
+        self.__pending[key] = Future()
+        return None, self.__generation
+
+    def __release(self, key, result=None, exception=None):
+        """
+        Give the result of the access of a directory to the threads waiting for it
+        :param key: (kind, directory)
+        :param result
+        :param exception
+        :return:
+        """
+        with self.__lock:
+            future = self.__pending.pop(key)
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def __list(self, path, list_func):
+        """
+        List a directory once per session, or reuse the persistent cache if the mtime of the directory hasn't changed
+        :param path
+        :param list_func: listing function of the backend
+        :return: sub directories names
+        """
+        key = ("list", path)
+        with self.__lock:
+            if path in self.__listings:
+                return self.__listings[path]
+            future, generation = self.__claim(key)
+        if future is not None:
+            return future.result()
+        try:
+            mtime = self.__backend.get_mtime(path)
+            with self.__lock:
+                cache = self.__cache
+                entries = cache.get_entries(path, mtime) if cache is not None and mtime is not None else None
+            listed = entries is None
+            if listed:
+                entries = list_func(path)
+            else:
+                entries = [sys.intern(entry) for entry in entries]
+            with self.__lock:
+                # Not recorded if the directory has been refreshed meanwhile
+                if generation == self.__generation:
+                    if listed and cache is not None and mtime is not None:
+                        cache.set_entries(path, mtime, entries)
+                    self.__listings[path] = entries
+                    self.__mtimes[path] = mtime
+        except BaseException as e:
+            self.__release(key, exception=e)
+            raise
+        self.__release(key, entries)
+        return entries
+
+    def list_variants(self, publish_ass_dir):
+        return self.__list(publish_ass_dir, self.__backend.list_variants)
+
+    def list_versions(self, variant_dir):
+        return self.__list(variant_dir, self.__backend.list_versions)
+
+    def get_version_status(self, version_dir, file_base):
+        """
+        Getter of the files of a version directory, recorded once per session. The complete versions are recorded
+        once for all in the persistent cache (a published version doesn't change anymore). The incomplete ones are
+        kept with the mtime of their directory until they are refreshed
+        :param version_dir
+        :param file_base: <asset>_<variant>
+        :return: VersionStatus
+        """
+        key = ("status", version_dir)
+        with self.__lock:
+            if version_dir in self.__statuses:
+                return self.__statuses[version_dir]
+            future, generation = self.__claim(key)
+            cache = self.__cache
+            cached = cache.get_status(version_dir) if cache is not None and future is None else None
+        if future is not None:
+            return future.result()
+        try:
+            mtime = None
+            if cached is not None:
+                status = VersionStatus(*cached)
+            else:
+                status = self.__backend.get_version_status(version_dir, file_base)
+                if not status.complete:
+                    # The mtime is read before checking again so a publish ending meanwhile is seen as a change
+                    mtime = self.__backend.get_mtime(version_dir)
+                    status = self.__backend.get_version_status(version_dir, file_base)
+            with self.__lock:
+                if status.complete and cached is None and cache is not None:
+                    cache.set_status(version_dir, list(status))
+                # Not recorded if the directory has been refreshed meanwhile
+                if generation == self.__generation:
+                    self.__statuses[version_dir] = status
+                    if not status.complete:
+                        self.__pending_dirs.add(version_dir)
+                        self.__mtimes[version_dir] = mtime
+        except BaseException as e:
+            self.__release(key, exception=e)
+            raise
+        self.__release(key, status)
+        return status
+
+    def get_version_statuses(self, version_dirs):
+        """
+        Getter of the files of many version directories. The ones not recorded yet are listed in parallel to hide the
+        latency of network filesystems
+        :param version_dirs: list of (version dir, file base)
+        :return: version dir -> VersionStatus
+        """
+        statuses = {}
+        unknown_dirs = {}
+        with self.__lock:
+            for version_dir, file_base in version_dirs:
+                if version_dir in self.__statuses:
+                    statuses[version_dir] = self.__statuses[version_dir]
+                else:
+                    unknown_dirs[version_dir] = file_base
+        unknown_dirs = list(unknown_dirs.items())
+        if len(unknown_dirs) <= 1:
+            statuses.update((version_dir, self.get_version_status(version_dir, file_base))
+                            for version_dir, file_base in unknown_dirs)
+        else:
+            with ThreadPoolExecutor(max_workers=_EXISTS_WORKERS) as executor:
+                statuses.update(zip((version_dir for version_dir, _ in unknown_dirs),
+                                    executor.map(lambda version_dir: self.get_version_status(*version_dir),
+                                                 unknown_dirs)))
+        return statuses
+
+    def exists_all(self, paths):
+        """
+        Check whether files exist. The files of the versions are given by their status, the version directories
+        not recorded yet are listed in parallel
+        :param paths
+        :return: path -> exists
+        """
+        exists = {}
+        unknown_paths = []
+        version_files = []
+        with self.__lock:
+            for path in paths:
+                if path in self.__exists:
+                    exists[path] = self.__exists[path]
+                    continue
+                version_file = _split_version_file(path)
+                if version_file is not None:
+                    version_files.append((path, version_file))
+                else:
+                    unknown_paths.append(path)
+        statuses = self.get_version_statuses([version_file[:2] for _, version_file in version_files])
+        for path, (version_dir, file_base, ext) in version_files:
+            exists[path] = _exists_from_status(statuses[version_dir], ext)
+        if len(unknown_paths) > 0:
+            checked = self.__backend.exists_all(unknown_paths)
+            with self.__lock:
+                self.__exists.update(checked)
+            exists.update(checked)
+        return exists
+
+    def get_mtime(self, path):
+        return self.__backend.get_mtime(path)
+
+    def get_listed_mtimes(self):
+        listed_mtimes = self.__backend.get_listed_mtimes()
+        with self.__lock:
+            listed_mtimes.update(self.__mtimes)
+        return listed_mtimes
+
+    def get_pending_dirs(self):
+        pending_dirs = self.__backend.get_pending_dirs()
+        with self.__lock:
+            pending_dirs.extend(self.__pending_dirs)
+        return pending_dirs
+
+    def refresh(self, dirs):
+        dirs = set(dirs)
+        with self.__lock:
+            self.__generation += 1
+            for directory in dirs:
+                self.__listings.pop(directory, None)
+                self.__mtimes.pop(directory, None)
+            # The incomplete versions of the directories refreshed are checked again
+            for version_dir in [version_dir for version_dir in self.__pending_dirs
+                                if version_dir in dirs or os.path.dirname(version_dir) in dirs]:
+                self.__pending_dirs.discard(version_dir)
+                self.__statuses.pop(version_dir, None)
+                self.__mtimes.pop(version_dir, None)
+            self.__exists.clear()
+        self.__backend.refresh(dirs)
+
+    def clear(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__listings.clear()
+            self.__mtimes.clear()
+            self.__statuses.clear()
+            self.__pending_dirs.clear()
+            self.__exists.clear()
+        self.__backend.clear()
+
+
+# ######################################################################################################################
+
+class ManifestBackend(PublishBackend):
+    """
+    Publishes read from a prebuilt manifest (JSON or SQLite) loaded in memory. The directories absent from the
+    manifest, or that have changed since it was loaded, are delegated to a fallback backend
+    """
+
+    @staticmethod
+    def read_manifest(manifest_path):
+        """
+        Read a manifest
+        :param manifest_path: .json or .sqlite/.db file
+        :return: {"format", "publish_dirs": {publish_ass_dir: {"mtime", "variants": {variant_dir_name:
+                 {"mtime", "versions": {version: [ass_size, has_ma, complete]}}}}}}
+        """
+        if os.path.splitext(manifest_path)[1] == ".json":
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        else:
+            manifest = ManifestBackend.__read_sqlite(manifest_path)
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError("Unsupported manifest format in " + manifest_path)
+        return manifest
+
+    @staticmethod
+    def __read_sqlite(manifest_path):
+        """
+        Read a SQLite manifest (tables publish_dirs, variants and versions)
+        :param manifest_path
+        :return: manifest
+        """
+        publish_dirs = {}
+        connection = sqlite3.connect(manifest_path)
+        try:
+            manifest_format = connection.execute("SELECT value FROM info WHERE key = 'format'").fetchone()
+            for path, mtime in connection.execute("SELECT path, mtime FROM publish_dirs"):
+                publish_dirs[path] = {"mtime": mtime, "variants": {}}
+            for publish_dir, name, mtime in connection.execute("SELECT publish_dir, name, mtime FROM variants"):
+                publish_dirs[publish_dir]["variants"][name] = {"mtime": mtime, "versions": {}}
+            for publish_dir, variant, version, ass_size, has_ma, complete in connection.execute(
+                    "SELECT publish_dir, variant, version, ass_size, has_ma, complete FROM versions"):
+                publish_dirs[publish_dir]["variants"][variant]["versions"][version] = \
+                    [ass_size, bool(has_ma), bool(complete)]
+        finally:
+            connection.close()
+        return {"format": int(manifest_format[0]) if manifest_format else None, "publish_dirs": publish_dirs}
+
+    def __init__(self, manifest_path, fallback=None):
+        """
+        Constructor
+        :param manifest_path: .json or .sqlite/.db file
+        :param fallback: backend of the directories absent from the manifest
+        """
+        self.__fallback = fallback
+        # Publish ass dir -> variant directory names
+        self.__variants = {}
+        # Variant dir -> versions
+        self.__versions = {}
+        # Version dir -> VersionStatus
+        self.__statuses = {}
+        # Directory -> mtime when indexed
+        self.__mtimes = {}
+        # Directories changed since the manifest was loaded
+        self.__changed_dirs = set()
+        self.__load(manifest_path)
+
+    def __load(self, manifest_path):
+        """
+        Load a manifest in memory
+        :param manifest_path
+        :return:
+        """
+        manifest = ManifestBackend.read_manifest(manifest_path)
+        for publish_ass_dir, publish_data in manifest["publish_dirs"].items():
+            publish_ass_dir = sys.intern(publish_ass_dir)
+            self.__mtimes[publish_ass_dir] = publish_data["mtime"]
+            self.__variants[publish_ass_dir] = sorted(sys.intern(name) for name in publish_data["variants"].keys())
+            for variant_dir_name, variant_data in publish_data["variants"].items():
+                variant_dir = publish_ass_dir + "/" + variant_dir_name
+                self.__mtimes[variant_dir] = variant_data["mtime"]
+                self.__versions[variant_dir] = sorted(sys.intern(version)
+                                                      for version in variant_data["versions"].keys())
+                for version, status in variant_data["versions"].items():
+                    self.__statuses[variant_dir + "/" + version] = VersionStatus(*status)
+
+    def __is_known(self, directory, table):
+        """
+        Getter of whether a directory is in the manifest and hasn't changed since
+        :param directory
+        :param table: table of the manifest
+        :return: is known
+        """
+        return directory in table and directory not in self.__changed_dirs
+
+    def list_variants(self, publish_ass_dir):
+        if self.__is_known(publish_ass_dir, self.__variants):
+            return self.__variants[publish_ass_dir]
+        return self.__fallback.list_variants(publish_ass_dir) if self.__fallback is not None else []
+
+    def list_versions(self, variant_dir):
+        if self.__is_known(variant_dir, self.__versions):
+            return self.__versions[variant_dir]
+        return self.__fallback.list_versions(variant_dir) if self.__fallback is not None else []
+
+    def __get_complete_status(self, version_dir):
+        """
+        Getter of the status of a version complete in the manifest whose directory hasn't changed since (the versions
+        being published when the manifest was generated are checked again)
+        :param version_dir
+        :return: VersionStatus or None
+        """
+        status = self.__statuses.get(version_dir)
+        if status is None or not status.complete or os.path.dirname(version_dir) in self.__changed_dirs:
+            return None
+        return status
+
+    def get_version_status(self, version_dir, file_base):
+        status = self.__get_complete_status(version_dir)
+        if status is not None:
+            return status
+        if self.__fallback is not None:
+            return self.__fallback.get_version_status(version_dir, file_base)
+        return self.__statuses.get(version_dir, _MISSING_STATUS)
+
+    def get_version_statuses(self, version_dirs):
+        statuses = {}
+        unknown_dirs = []
+        for version_dir, file_base in version_dirs:
+            status = self.__get_complete_status(version_dir)
+            if status is not None:
+                statuses[version_dir] = status
+            else:
+                unknown_dirs.append((version_dir, file_base))
+        if len(unknown_dirs) > 0:
+            if self.__fallback is not None:
+                statuses.update(self.__fallback.get_version_statuses(unknown_dirs))
+            else:
+                statuses.update((version_dir, self.__statuses.get(version_dir, _MISSING_STATUS))
+                                for version_dir, _ in unknown_dirs)
+        return statuses
+
+    def exists_all(self, paths):
+        exists = {}
+        unknown_paths = []
+        for path in paths:
+            version_file = _split_version_file(path)
+            if version_file is not None and version_file[0] in self.__statuses:
+                version_dir, file_base, ext = version_file
+                exists[path] = _exists_from_status(self.get_version_status(version_dir, file_base), ext)
+            else:
+                unknown_paths.append(path)
+        if len(unknown_paths) > 0:
+            if self.__fallback is not None:
+                exists.update(self.__fallback.exists_all(unknown_paths))
+            else:
+                exists.update((path, False) for path in unknown_paths)
+        return exists
+
+    def get_mtime(self, path):
+        if self.__is_known(path, self.__mtimes):
+            return self.__mtimes[path]
+        return self.__fallback.get_mtime(path) if self.__fallback is not None else None
+
+    def get_listed_mtimes(self):
+        # The directories of the manifest are not checked, it is refreshed by the indexer
+        return self.__fallback.get_listed_mtimes() if self.__fallback is not None else {}
+
+    def get_pending_dirs(self):
+        # The versions incomplete in the manifest are checked through the fallback
+        return self.__fallback.get_pending_dirs() if self.__fallback is not None else []
+
+    def set_cache(self, cache):
+        if self.__fallback is not None:
+            self.__fallback.set_cache(cache)
+
+    def refresh(self, dirs):
+        self.__changed_dirs.update(dirs)
+        if self.__fallback is not None:
+            self.__fallback.refresh(dirs)
+
+    def clear(self):
+        if self.__fallback is not None:
+            self.__fallback.clear()
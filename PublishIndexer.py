@@ -0,0 +1,232 @@
+"""
+Indexer of the asset library : crawl the publish directories in parallel and write a publish manifest (JSON or
+SQLite) read by the ManifestBackend. A previous manifest is updated incrementally with the mtimes of the directories.
+
+    python -m asset_loader.PublishIndexer "/prod/assets/*/publish/ass" --output manifest.json --workers 16
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .PublishBackend import *
+
+# ######################################################################################################################
+
+_INDEX_WORKERS = 16
+
+
+# ######################################################################################################################
+
+class PublishIndexer:
+    """
+    Crawl publish directories at format <publish_ass_dir>/<asset>_<variant>/<version>/<asset>_<variant>.ass
+    """
+
+    def __init__(self, workers=_INDEX_WORKERS, previous_manifest=None):
+        """
+        Constructor
+        :param workers: number of threads listing the directories
+        :param previous_manifest: manifest reused for the directories whose mtime hasn't changed
+        """
+        self.__workers = workers
+        self.__backend = FileSystemBackend()
+        self.__previous_dirs = previous_manifest["publish_dirs"] if previous_manifest is not None else {}
+        # Directories listed and reused (for the report of the indexing)
+        self.__nb_listed = 0
+        self.__nb_reused = 0
+
+    def get_nb_listed(self):
+        """
+        Getter of the number of variant directories listed
+        :return: number listed
+        """
+        return self.__nb_listed
+
+    def get_nb_reused(self):
+        """
+        Getter of the number of variant directories reused from the previous manifest
+        :return: number reused
+        """
+        return self.__nb_reused
+
+    @staticmethod
+    def get_pairs(variant_dir_names):
+        """
+        Pair the variant directories of the levels of detail (<asset>_<name>HD <-> <asset>_<name>SD ...)
+        :param variant_dir_names
+        :return: variant dir name -> {level of detail : variant dir name}
+        """
+        return get_lod_pairs(variant_dir_names)
+
+    def __index_variant(self, publish_ass_dir, variant_dir_name, previous_variant):
+        """
+        Index the versions of a variant directory. The complete versions of the previous manifest are reused if the
+        mtime of the directory hasn't changed
+        :param publish_ass_dir
+        :param variant_dir_name
+        :param previous_variant: data of the variant in the previous manifest or None
+        :return: data of the variant and whether it has been listed
+        """
+        variant_dir = publish_ass_dir + "/" + variant_dir_name
+        mtime = self.__backend.get_mtime(variant_dir)
+        if previous_variant is not None and previous_variant["mtime"] == mtime:
+            versions = dict(previous_variant["versions"])
+            listed = False
+            for version, status in versions.items():
+                # The versions still being published are checked again
+                if not VersionStatus(*status).complete:
+                    versions[version] = list(self.__backend.get_version_status(variant_dir + "/" + version,
+                                                                               variant_dir_name))
+        else:
+            versions = {version: list(self.__backend.get_version_status(variant_dir + "/" + version,
+                                                                        variant_dir_name))
+                        for version in self.__backend.list_versions(variant_dir)}
+            listed = True
+        return {"mtime": mtime, "versions": dict(sorted(versions.items()))}, listed
+
+    def __list_publish_dir(self, publish_ass_dir):
+        """
+        List the variant directories of a publish directory. The variants of the previous manifest are reused if the
+        mtime of the directory hasn't changed
+        :param publish_ass_dir
+        :return: mtime and variant dir names
+        """
+        mtime = self.__backend.get_mtime(publish_ass_dir)
+        previous_publish = self.__previous_dirs.get(publish_ass_dir)
+        if previous_publish is not None and previous_publish["mtime"] == mtime:
+            return mtime, list(previous_publish["variants"].keys())
+        return mtime, self.__backend.list_variants(publish_ass_dir)
+
+    def index(self, publish_ass_dirs):
+        """
+        Index publish directories in two parallel stages : the publish directories are listed then their variant
+        directories
+        :param publish_ass_dirs
+        :return: manifest
+        """
+        publish_ass_dirs = sorted(set(publish_ass_dir.replace("\\", "/").rstrip("/")
+                                      for publish_ass_dir in publish_ass_dirs))
+        publish_dirs = {}
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            variant_futures = {}
+            for publish_ass_dir, (mtime, variant_dir_names) in zip(
+                    publish_ass_dirs, executor.map(self.__list_publish_dir, publish_ass_dirs)):
+                previous_publish = self.__previous_dirs.get(publish_ass_dir)
+                previous_variants = previous_publish["variants"] if previous_publish is not None else {}
+                for variant_dir_name in variant_dir_names:
+                    variant_futures[(publish_ass_dir, variant_dir_name)] = executor.submit(
+                        self.__index_variant, publish_ass_dir, variant_dir_name,
+                        previous_variants.get(variant_dir_name))
+                publish_dirs[publish_ass_dir] = {"mtime": mtime, "variants": {}}
+            for (publish_ass_dir, variant_dir_name), future in variant_futures.items():
+                variant_data, listed = future.result()
+                publish_dirs[publish_ass_dir]["variants"][variant_dir_name] = variant_data
+                if listed:
+                    self.__nb_listed += 1
+                else:
+                    self.__nb_reused += 1
+        for publish_data in publish_dirs.values():
+            publish_data["pairs"] = PublishIndexer.get_pairs(publish_data["variants"].keys())
+        return {"format": MANIFEST_FORMAT, "indexed_at": time.time(), "publish_dirs": publish_dirs}
+
+    @staticmethod
+    def write_manifest(manifest, manifest_path):
+        """
+        Write a manifest atomically (the readers never see a partial file)
+        :param manifest
+        :param manifest_path: .json or .sqlite/.db file
+        :return:
+        """
+        tmp_path = manifest_path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if os.path.splitext(manifest_path)[1] == ".json":
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f, separators=(",", ":"))
+        else:
+            PublishIndexer.__write_sqlite(manifest, tmp_path)
+        os.replace(tmp_path, manifest_path)
+
+    @staticmethod
+    def __write_sqlite(manifest, manifest_path):
+        """
+        Write a SQLite manifest (tables info, publish_dirs, variants, versions and pairs)
+        :param manifest
+        :param manifest_path
+        :return:
+        """
+        connection = sqlite3.connect(manifest_path)
+        try:
+            connection.executescript("""
+                CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE publish_dirs (path TEXT PRIMARY KEY, mtime REAL);
+                CREATE TABLE variants (publish_dir TEXT, name TEXT, mtime REAL, PRIMARY KEY (publish_dir, name));
+                CREATE TABLE versions (publish_dir TEXT, variant TEXT, version TEXT, ass_size INTEGER,
+                                       has_ma INTEGER, complete INTEGER, PRIMARY KEY (publish_dir, variant, version));
+                CREATE TABLE pairs (publish_dir TEXT, variant TEXT, lod TEXT, counterpart TEXT);
+            """)
+            connection.executemany("INSERT INTO info VALUES (?, ?)", [
+                ("format", str(manifest["format"])), ("indexed_at", str(manifest.get("indexed_at", "")))])
+            publish_dirs = manifest["publish_dirs"]
+            connection.executemany("INSERT INTO publish_dirs VALUES (?, ?)", [
+                (path, publish_data["mtime"]) for path, publish_data in publish_dirs.items()])
+            connection.executemany("INSERT INTO variants VALUES (?, ?, ?)", [
+                (path, name, variant_data["mtime"]) for path, publish_data in publish_dirs.items()
+                for name, variant_data in publish_data["variants"].items()])
+            connection.executemany("INSERT INTO versions VALUES (?, ?, ?, ?, ?, ?)", [
+                (path, name, version, status[0], int(status[1]), int(status[2]))
+                for path, publish_data in publish_dirs.items()
+                for name, variant_data in publish_data["variants"].items()
+                for version, status in variant_data["versions"].items()])
+            connection.executemany("INSERT INTO pairs VALUES (?, ?, ?, ?)", [
+                (path, name, lod, counterpart) for path, publish_data in publish_dirs.items()
+                for name, lods in publish_data.get("pairs", {}).items() for lod, counterpart in lods.items()])
+            connection.commit()
+        finally:
+            connection.close()
+
+
+# ######################################################################################################################
+
+def main(argv=None):
+    """
+    Entry point of the command line
+    :param argv
+    :return: exit code
+    """
+    parser = argparse.ArgumentParser(description="Index publish directories in a manifest for Asset Loader")
+    parser.add_argument("publish_dirs", nargs="+", help="publish ass directories or glob patterns")
+    parser.add_argument("--output", required=True, help="path of the manifest (.json or .sqlite)")
+    parser.add_argument("--workers", type=int, default=_INDEX_WORKERS, help="number of threads listing directories")
+    parser.add_argument("--full", action="store_true", help="index everything again instead of updating the output")
+    args = parser.parse_args(argv)
+
+    publish_ass_dirs = []
+    for pattern in args.publish_dirs:
+        publish_ass_dirs.extend(path for path in (glob.glob(pattern) or [pattern]) if os.path.isdir(path))
+
+    previous_manifest = None
+    if not args.full and os.path.isfile(args.output):
+        try:
+            previous_manifest = ManifestBackend.read_manifest(args.output)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print("Previous manifest ignored : " + str(e), file=sys.stderr)
+
+    start = time.perf_counter()
+    indexer = PublishIndexer(args.workers, previous_manifest)
+    manifest = indexer.index(publish_ass_dirs)
+    PublishIndexer.write_manifest(manifest, args.output)
+    print("%d publish directories indexed in %.2fs (%d variants listed, %d reused) -> %s" % (
+        len(manifest["publish_dirs"]), time.perf_counter() - start, indexer.get_nb_listed(), indexer.get_nb_reused(),
+        args.output), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from PySide2.QtCore import *
+
+# ######################################################################################################################
+
+_POLL_INTERVAL_S = 5.0
+_INOTIFY_TIMEOUT_S = 0.5
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_ONLYDIR = 0x01000000
+# The .ass written in place in a version being published is seen when it is closed
+_IN_MASK = _IN_CLOSE_WRITE | _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_ONLYDIR
+_IN_EVENT_STRUCT = struct.Struct("iIII")
+
+
+# ######################################################################################################################
+
+class PublishWatcher(QObject):
+    """
+    Watch publish directories and notify when their content changes. Uses inotify on Linux and falls back on polling
+    the mtime of the directories. inotify doesn't see the changes made by other NFS clients, so polling can be forced.
+    The directories inotify can't watch (limit of watches reached, permission denied) are polled
+    """
+    directories_changed = Signal(list)
+
+    def __init__(self, use_inotify=True, poll_interval=_POLL_INTERVAL_S, parent=None):
+        """
+        Constructor
+        :param use_inotify: whether inotify must be used if available
+        :param poll_interval: interval between two polls in seconds
+        :param parent
+        """
+        super(PublishWatcher, self).__init__(parent)
+        self.__poll_interval = poll_interval
+        self.__lock = threading.Lock()
+        # Directory -> watch descriptor (None if polled)
+        self.__directories = {}
+        # Directory polled -> mtime
+        self.__polled = {}
+        # Watch descriptor -> directory
+        self.__watches = {}
+        self.__use_inotify = use_inotify
+        self.__libc = None
+        self.__inotify_fd = self.__init_inotify() if use_inotify else None
+        self.__stop_event = threading.Event()
+        self.__thread = None
+
+    def __init_inotify(self):
+        """
+        Initialize inotify if available
+        :return: inotify file descriptor or None
+        """
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            # find_library runs ldconfig so it is only used if the usual name of the libc is not found
+            try:
+                self.__libc = ctypes.CDLL("libc.so.6", use_errno=True)
+            except OSError:
+                self.__libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            inotify_fd = self.__libc.inotify_init1(os.O_NONBLOCK)
+        except (OSError, AttributeError):
+            return None
+        return inotify_fd if inotify_fd >= 0 else None
+
+    def is_using_inotify(self):
+        """
+        Getter of whether inotify is used
+        :return: is using inotify
+        """
+        return self.__inotify_fd is not None
+
+    def set_directories(self, directories):
+        """
+        Setter of the directories to watch
+        :param directories
+        :return:
+        """
+        directories = set(directories)
+        with self.__lock:
+            for directory in list(self.__directories.keys()):
+                if directory not in directories:
+                    watch = self.__directories.pop(directory)
+                    self.__polled.pop(directory, None)
+                    if self.__inotify_fd is not None and watch is not None:
+                        self.__libc.inotify_rm_watch(self.__inotify_fd, watch)
+                        self.__watches.pop(watch, None)
+            for directory in directories:
+                if directory in self.__directories:
+                    continue
+                watch = None
+                if self.__inotify_fd is not None:
+                    watch = self.__libc.inotify_add_watch(self.__inotify_fd, directory.encode(), _IN_MASK)
+                    # Not watchable by inotify (ENOSPC when max_user_watches is reached, EACCES...), polled instead
+                    if watch < 0:
+                        watch = None
+                    else:
+                        self.__watches[watch] = directory
+                self.__directories[directory] = watch
+                if watch is None:
+                    self.__polled[directory] = PublishWatcher.__get_mtime(directory)
+
+    @staticmethod
+    def __get_mtime(directory):
+        """
+        Getter of the mtime of a directory
+        :param directory
+        :return: mtime or None if the directory doesn't exist
+        """
+        try:
+            return os.stat(directory).st_mtime
+        except OSError:
+            return None
+
+    def start(self):
+        """
+        Start watching in a background thread
+        :return:
+        """
+        if self.__thread is not None:
+            return
+        if self.__use_inotify and self.__inotify_fd is None:
+            self.__inotify_fd = self.__init_inotify()
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.__run, name="PublishWatcher", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stop watching
+        :return:
+        """
+        if self.__thread is None:
+            return
+        self.__stop_event.set()
+        self.__thread.join()
+        self.__thread = None
+        if self.__inotify_fd is not None:
+            os.close(self.__inotify_fd)
+            self.__inotify_fd = None
+        with self.__lock:
+            self.__directories.clear()
+            self.__polled.clear()
+            self.__watches.clear()
+
+    def __run(self):
+        """
+        Loop of the background thread
+        :return:
+        """
+        next_poll = time.monotonic() + self.__poll_interval
+        while not self.__stop_event.is_set():
+            if self.__inotify_fd is not None:
+                directories_changed = self.__read_inotify()
+                # The directories inotify can't watch are polled in between
+                if time.monotonic() >= next_poll:
+                    directories_changed.update(self.__poll())
+                    next_poll = time.monotonic() + self.__poll_interval
+            else:
+                if self.__stop_event.wait(self.__poll_interval):
+                    break
+                directories_changed = self.__poll()
+            if len(directories_changed) > 0:
+                self.directories_changed.emit(sorted(directories_changed))
+
+    def __read_inotify(self):
+        """
+        Wait for inotify events
+        :return: directories changed
+        """
+        directories_changed = set()
+        ready, _, _ = select.select([self.__inotify_fd], [], [], _INOTIFY_TIMEOUT_S)
+        if len(ready) == 0:
+            return directories_changed
+        try:
+            data = os.read(self.__inotify_fd, 65536)
+        except BlockingIOError:
+            return directories_changed
+        offset = 0
+        with self.__lock:
+            while offset + _IN_EVENT_STRUCT.size <= len(data):
+                watch, mask, cookie, length = _IN_EVENT_STRUCT.unpack_from(data, offset)
+                offset += _IN_EVENT_STRUCT.size + length
+                if watch in self.__watches:
+                    directories_changed.add(self.__watches[watch])
+        return directories_changed
+
+    def __poll(self):
+        """
+        Compare the mtime of the directories with the ones of the previous poll
+        :return: directories changed
+        """
+        directories_changed = set()
+        with self.__lock:
+            directories = list(self.__polled.items())
+        for directory, mtime in directories:
+            new_mtime = PublishWatcher.__get_mtime(directory)
+            if new_mtime != mtime:
+                directories_changed.add(directory)
+                with self.__lock:
+                    if directory in self.__polled:
+                        self.__polled[directory] = new_mtime
+        return directories_changed
@@ -0,0 +1,152 @@
+import os
+import threading
+
+import maya.OpenMaya as OpenMaya
+
+from .VersionIndex import *
+from .VersionCache import *
+from .StandinInventory import *
+from .Profiler import *
+
+# ######################################################################################################################
+
+# Niceness of the warm-up thread (Linux only)
+_WARM_NICENESS = 19
+
+
+# ######################################################################################################################
+
+class ScenePrefetcher:
+    """
+    Optional scene open hook warming the VersionIndex with the dso paths of the scene in a low priority background
+    thread, so the first opening of the Asset Loader doesn't list the publish directories.
+    The warm-up is cancelled when another scene is opened or created
+    """
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        """
+        Getter of the process-wide instance
+        :return: instance
+        """
+        if ScenePrefetcher.__instance is None:
+            ScenePrefetcher.__instance = ScenePrefetcher()
+        return ScenePrefetcher.__instance
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.__callback_ids = []
+        self.__lock = threading.Lock()
+        self.__cancel_event = None
+        self.__thread = None
+        # Whether the index has been warmed for the current scene and not used by the Asset Loader yet
+        self.__warmed = False
+
+    def is_installed(self):
+        """
+        Getter of whether the hook is installed
+        :return: is installed
+        """
+        return len(self.__callback_ids) > 0
+
+    def install(self):
+        """
+        Install the scene open hook (from a userSetup.py or from the Asset Loader)
+        :return:
+        """
+        if self.is_installed():
+            return
+        self.__callback_ids = [
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kBeforeOpen, self.__on_scene_changing),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kBeforeNew, self.__on_scene_changing),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kAfterOpen, self.__on_scene_opened),
+        ]
+
+    def uninstall(self):
+        """
+        Remove the scene open hook and cancel the warm-up running
+        :return:
+        """
+        for callback_id in self.__callback_ids:
+            OpenMaya.MMessage.removeCallback(callback_id)
+        self.__callback_ids = []
+        self.cancel()
+
+    def cancel(self):
+        """
+        Cancel the warm-up running. The listings already done stay valid
+        :return:
+        """
+        with self.__lock:
+            if self.__cancel_event is not None:
+                self.__cancel_event.set()
+                self.__cancel_event = None
+            self.__thread = None
+            self.__warmed = False
+
+    def is_running(self):
+        """
+        Getter of whether the warm-up of the current scene is running
+        :return: is running
+        """
+        with self.__lock:
+            return self.__thread is not None and self.__thread.is_alive()
+
+    def take_warmed(self):
+        """
+        Getter of whether the index has been warmed for the current scene. The warm-up is used once
+        :return: is warmed
+        """
+        with self.__lock:
+            warmed = self.__warmed
+            self.__warmed = False
+            return warmed
+
+    def __on_scene_changing(self, *args):
+        """
+        On scene about to change the warm-up of the previous scene is cancelled
+        :return:
+        """
+        self.cancel()
+
+    def __on_scene_opened(self, *args):
+        """
+        On scene opened collect the dso paths in the main thread and warm the index in a background thread
+        :return:
+        """
+        self.cancel()
+        # The DAG is walked once, the inventory doesn't track the changes
+        dsos = list(set(StandinInventory().get_dsos().values()))
+        if len(dsos) == 0:
+            return
+        version_index = VersionIndex.get_instance()
+        if version_index.get_cache() is None:
+            version_index.set_cache(VersionCache())
+        with self.__lock:
+            self.__cancel_event = threading.Event()
+            self.__thread = threading.Thread(target=self.__run, args=(version_index, dsos, self.__cancel_event),
+                                             name="ScenePrefetcher", daemon=True)
+            self.__thread.start()
+
+    def __run(self, version_index, dsos, cancel_event):
+        """
+        Warm the index in the background thread
+        :param version_index
+        :param dsos
+        :param cancel_event
+        :return:
+        """
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), _WARM_NICENESS)
+        except (AttributeError, OSError):
+            pass
+        with Profiler.get_instance().timed("prefetch_scene", dsos=len(dsos)):
+            completed = version_index.warm(dsos, cancel_event)
+        with self.__lock:
+            if completed and not cancel_event.is_set():
+                self.__warmed = True
+                self.__cancel_event = None
+                self.__thread = None
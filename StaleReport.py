@@ -0,0 +1,216 @@
+from array import array
+from collections import Counter
+from itertools import compress
+
+from .VersionIndex import *
+
+# ######################################################################################################################
+
+_STANDIN_TYPE = "aiStandIn"
+# Gap of the dso that don't follow the publish layout
+_GAP_UNRESOLVED = None
+
+
+# ######################################################################################################################
+
+class StaleReport:
+    """
+    Staleness of all the standins of a scene. The dso of the nodes are stored as codes in a columnar array and the
+    comparison with the last versions is done once per distinct dso, so no Python object is built per node
+    """
+
+    def __init__(self, version_index=None):
+        """
+        Constructor
+        :param version_index: version index used to find the last versions
+        """
+        self.__version_index = version_index if version_index is not None else VersionIndex.get_instance()
+        # Dso -> code
+        self.__dso_codes = {}
+        # Code of the dso of each node
+        self.__node_codes = array("l")
+        # Nodes in the order of the codes (MObjectArray when collected from the scene)
+        self.__nodes = None
+        # Per dso code : asset, publish dir, variant dir name, version, last version and gap with it (computed)
+        self.__assets = []
+        self.__publish_ass_dirs = []
+        self.__variant_dir_names = []
+        self.__versions = []
+        self.__last_versions = []
+        self.__gaps = []
+        self.__computed = False
+
+    @staticmethod
+    def from_scene(version_index=None):
+        """
+        Collect the dso of all the standins of the scene in one OpenMaya iterator pass
+        :param version_index: version index used to find the last versions
+        :return: report
+        """
+        import maya.OpenMaya as OpenMaya
+
+        report = StaleReport(version_index)
+        nodes = OpenMaya.MObjectArray()
+        fn_node = OpenMaya.MFnDependencyNode()
+
+        def iter_dsos():
+            it = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kShape)
+            while not it.isDone():
+                node = it.thisNode()
+                fn_node.setObject(node)
+                if fn_node.typeName() == _STANDIN_TYPE:
+                    nodes.append(node)
+                    yield fn_node.findPlug("dso").asString()
+                it.next()
+
+        report.add_dsos(iter_dsos())
+        report.__nodes = nodes
+        return report
+
+    def add_dsos(self, dsos):
+        """
+        Add the dso of nodes
+        :param dsos
+        :return:
+        """
+        dso_codes = self.__dso_codes
+        self.__node_codes.extend(dso_codes.setdefault(dso, len(dso_codes)) for dso in dsos)
+        self.__computed = False
+
+    def __get_latest(self, publish_ass_dir, variant_dir_name):
+        """
+        Getter of the latest version table of a variant directory
+        :param publish_ass_dir
+        :param variant_dir_name
+        :return: asset, rank of each version, last version and its rank
+        """
+        indexed = self.__version_index.find(publish_ass_dir, variant_dir_name)
+        asset = indexed[0] if indexed is not None else None
+        ranks = {version: rank for rank, version in
+                 enumerate(self.__version_index.list_versions(publish_ass_dir, variant_dir_name))}
+        last_version = self.__version_index.last_version(publish_ass_dir, variant_dir_name)
+        return asset, ranks, last_version, ranks.get(last_version)
+
+    def compute(self):
+        """
+        Compare every distinct dso with the last version of its variant (once per variant directory)
+        :return:
+        """
+        if self.__computed:
+            return
+        # The directories are listed in parallel first
+        self.__version_index.warm(self.__dso_codes.keys())
+        latest = {}
+        self.__assets = []
+        self.__publish_ass_dirs = []
+        self.__variant_dir_names = []
+        self.__versions = []
+        self.__last_versions = []
+        self.__gaps = []
+        for dso in self.__dso_codes.keys():
+            layout = VersionIndex.split_dso(dso)
+            if layout is None:
+                self.__assets.append(None)
+                self.__publish_ass_dirs.append(None)
+                self.__variant_dir_names.append(None)
+                self.__versions.append(None)
+                self.__last_versions.append(None)
+                self.__gaps.append(_GAP_UNRESOLVED)
+                continue
+            publish_ass_dir, variant_dir_name, version = layout
+            key = (publish_ass_dir, variant_dir_name)
+            if key not in latest:
+                latest[key] = self.__get_latest(publish_ass_dir, variant_dir_name)
+            asset, ranks, last_version, last_rank = latest[key]
+            self.__assets.append(asset)
+            self.__publish_ass_dirs.append(publish_ass_dir)
+            self.__variant_dir_names.append(variant_dir_name)
+            self.__versions.append(version)
+            self.__last_versions.append(last_version)
+            if last_version is None or last_version == version:
+                gap = 0
+            elif version in ranks:
+                # Negative if the active version is newer than the last usable one
+                gap = last_rank - ranks[version]
+            else:
+                # Active version not published anymore
+                gap = last_rank + 1
+            self.__gaps.append(gap)
+        self.__computed = True
+
+    def __get_stale_flags(self, include_unresolved=False):
+        """
+        Getter of whether each distinct dso is stale
+        :param include_unresolved: whether the dso that don't follow the publish layout are flagged too
+        :return: flag per dso code
+        """
+        self.compute()
+        return [gap != 0 and (gap is not _GAP_UNRESOLVED or include_unresolved) for gap in self.__gaps]
+
+    def get_nb_nodes(self):
+        """
+        Getter of the number of nodes
+        :return: number of nodes
+        """
+        return len(self.__node_codes)
+
+    def get_stale_node_indices(self, include_unresolved=False):
+        """
+        Getter of the indices of the stale nodes
+        :param include_unresolved: whether the nodes whose dso doesn't follow the publish layout are included
+        :return: array of node indices
+        """
+        stale_flags = self.__get_stale_flags(include_unresolved)
+        return array("l", compress(range(len(self.__node_codes)), map(stale_flags.__getitem__, self.__node_codes)))
+
+    def get_stale_node_names(self, include_unresolved=False):
+        """
+        Getter of the names of the stale nodes (only for a report collected from the scene)
+        :param include_unresolved: whether the nodes whose dso doesn't follow the publish layout are included
+        :return: node names
+        """
+        if self.__nodes is None:
+            return []
+        import maya.OpenMaya as OpenMaya
+
+        fn_dag_node = OpenMaya.MFnDagNode()
+        names = []
+        for node_index in self.get_stale_node_indices(include_unresolved):
+            fn_dag_node.setObject(self.__nodes[node_index])
+            names.append(fn_dag_node.partialPathName())
+        return names
+
+    def get_summary(self):
+        """
+        Getter of the stale counts by asset, by variant and by version gap. The variants are told apart by their
+        publish directory, the same variant can be published in several libraries
+        :return: {"nodes", "stale", "unresolved", "by_asset": {asset: {"nodes", "stale"}},
+                  "by_variant": {(publish ass dir, variant dir name): {"asset", "nodes", "stale", "last_version"}},
+                  "by_gap": {gap: stale}}
+        """
+        self.compute()
+        # The nodes are only counted, the rest is done on the distinct dso
+        counts = Counter(self.__node_codes)
+        summary = {"nodes": len(self.__node_codes), "stale": 0, "unresolved": 0,
+                   "by_asset": {}, "by_variant": {}, "by_gap": {}}
+        for code, nb_nodes in counts.items():
+            gap = self.__gaps[code]
+            if gap is _GAP_UNRESOLVED:
+                summary["unresolved"] += nb_nodes
+                continue
+            publish_ass_dir = self.__publish_ass_dirs[code]
+            variant_dir_name = self.__variant_dir_names[code]
+            asset = self.__assets[code] if self.__assets[code] is not None else variant_dir_name
+            nb_stale = nb_nodes if gap != 0 else 0
+            asset_summary = summary["by_asset"].setdefault(asset, {"nodes": 0, "stale": 0})
+            asset_summary["nodes"] += nb_nodes
+            asset_summary["stale"] += nb_stale
+            variant_summary = summary["by_variant"].setdefault((publish_ass_dir, variant_dir_name), {
+                "asset": asset, "nodes": 0, "stale": 0, "last_version": self.__last_versions[code]})
+            variant_summary["nodes"] += nb_nodes
+            variant_summary["stale"] += nb_stale
+            if nb_stale > 0:
+                summary["stale"] += nb_stale
+                summary["by_gap"][gap] = summary["by_gap"].get(gap, 0) + nb_stale
+        summary["by_gap"] = dict(sorted(summary["by_gap"].items()))
+        return summary
@@ -0,0 +1,69 @@
+from PySide2.QtWidgets import *
+from PySide2.QtCore import *
+
+# ######################################################################################################################
+
+_HEADERS = ["Asset / Variant", "Stale", "Nodes", "Last version"]
+
+
+# ######################################################################################################################
+
+class StaleReportDialog(QDialog):
+    """
+    Dashboard of the standins out of date of the scene by asset, by variant and by version gap
+    """
+
+    def __init__(self, summary, parent=None):
+        """
+        Constructor
+        :param summary: summary of a StaleReport
+        :param parent
+        """
+        super(StaleReportDialog, self).__init__(parent)
+        self.setWindowTitle("Stale standins")
+        self.setWindowFlags(Qt.Tool)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(500, 400)
+        self.__create_ui(summary)
+
+    def __create_ui(self, summary):
+        """
+        Create the ui
+        :param summary
+        :return:
+        """
+        main_lyt = QVBoxLayout()
+        main_lyt.setContentsMargins(8, 10, 8, 10)
+        self.setLayout(main_lyt)
+
+        # ML.1 : Totals
+        totals = "%d stale standins out of %d" % (summary["stale"], summary["nodes"])
+        if summary["unresolved"] > 0:
+            totals += " (%d outside of the publishes)" % summary["unresolved"]
+        main_lyt.addWidget(QLabel(totals))
+        # ML.2 : Version gaps
+        if len(summary["by_gap"]) > 0:
+            gaps = ", ".join("%d behind : %d" % (gap, nb_stale) if gap >= 0 else "%d ahead : %d" % (-gap, nb_stale)
+                             for gap, nb_stale in summary["by_gap"].items())
+            main_lyt.addWidget(QLabel("Versions " + gaps))
+
+        # ML.3 : Assets and their variants
+        tree = QTreeWidget()
+        tree.setHeaderLabels(_HEADERS)
+        tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        asset_items = {}
+        for asset, asset_summary in sorted(summary["by_asset"].items(),
+                                           key=lambda item: (-item[1]["stale"], item[0])):
+            asset_item = QTreeWidgetItem([asset, str(asset_summary["stale"]), str(asset_summary["nodes"]), ""])
+            tree.addTopLevelItem(asset_item)
+            asset_items[asset] = asset_item
+        for (publish_ass_dir, variant_dir_name), variant_summary in sorted(summary["by_variant"].items(),
+                                                                          key=lambda item: (item[0][1], item[0][0])):
+            asset_item = asset_items[variant_summary["asset"]]
+            variant_item = QTreeWidgetItem([
+                variant_dir_name, str(variant_summary["stale"]), str(variant_summary["nodes"]),
+                variant_summary["last_version"] or ""])
+            # The same variant can be published in several libraries
+            variant_item.setToolTip(0, publish_ass_dir)
+            asset_item.addChild(variant_item)
+        main_lyt.addWidget(tree)
@@ -1,9 +1,20 @@
 import os
 import re
+import sys
+from functools import partial
 import pymel.core as pm
 from common.standin_utils import *
+from .VersionIndex import *
+from .StaleReport import *
+from .StandinGroup import *
+from .Profiler import *
+
 
 class Standin:
+    # Slotted so thousands of standins don't each carry a __dict__
+    __slots__ = ("__standin", "__object_name", "__standin_name", "__publish_ass_dir", "__dso", "__versions",
+                 "__active_variant", "__active_version", "__parse_valid")
+
     def __init__(self, standin):
         """
         Constructor
@@ -12,6 +23,9 @@ class Standin:
         self.__standin = standin
         self.__object_name = ""
         self.__standin_name = ""
+        self.__publish_ass_dir = ""
+        # Dso of the node when parsed or set by the tool
+        self.__dso = ""
         self.__versions = {}
         self.__active_variant = ""
         self.__active_version = None
@@ -23,8 +37,16 @@ class Standin:
         Retrieve all the datas of the standin
         :return:
         """
+        index = VersionIndex.get_instance()
+        self.__dso = self.__standin.dso.get() or ""
+        layout = VersionIndex.split_dso(self.__dso)
+        if layout is not None and self.__parse_from_index(index, layout):
+            # The asset has already been indexed
+            return
+
         # Use the parse_standin function in common package (Illogic package)
-        parsed_data = parse_standin(self.__standin)
+        with Profiler.get_instance().timed("parse_standin", publish_ass_dir=layout[0] if layout else ""):
+            parsed_data = parse_standin(self.__standin)
         self.__object_name = parsed_data["object_name"]
         self.__parse_valid = parsed_data["valid"]
         if self.__parse_valid:
@@ -32,7 +54,64 @@ class Standin:
             self.__publish_ass_dir = parsed_data["publish_ass_dir"]
             self.__active_variant = parsed_data["active_variant"]
             self.__active_version = parsed_data["active_version"]
-            self.__versions = parsed_data["standin_versions"]
+            self.__versions = AssetVersions(self.__publish_ass_dir, self.__standin_name,
+                                            versions=parsed_data["standin_versions"])
+            if layout is not None:
+                # Index the asset for the next standins and share its table
+                index.add(layout[0], self.__standin_name)
+                self.__parse_from_index(index, layout)
+
+    def __parse_from_index(self, index, layout):
+        """
+        Retrieve the datas of the standin from the version index
+        :param index
+        :param layout: publish ass dir, variant dir name and version
+        :return: whether the asset is indexed
+        """
+        publish_ass_dir, variant_dir_name, version = layout
+        indexed = index.find(publish_ass_dir, variant_dir_name)
+        if indexed is None:
+            return False
+        standin_name, versions = indexed
+        self.__object_name = self.__standin.getParent().name()
+        self.__parse_valid = True
+        self.__standin_name = standin_name
+        self.__publish_ass_dir = publish_ass_dir
+        self.__active_variant = sys.intern(variant_dir_name[len(standin_name) + 1:])
+        self.__active_version = version
+        self.__versions = versions
+        return True
+
+    @staticmethod
+    def retrieve_standins(standin_inventory, previous_standins=None, version_index=None):
+        """
+        Retrieve the standins of the selection, or without selection the standins out of date of the scene. These ones
+        are found without parsing every standin. The standins already retrieved are reused if their dso hasn't changed
+        :param standin_inventory: StandinInventory of the scene
+        :param previous_standins: node name -> standin retrieved before
+        :param version_index
+        :return: node name -> standin sorted by node name
+        """
+        if previous_standins is None:
+            previous_standins = {}
+        if version_index is None:
+            version_index = VersionIndex.get_instance()
+        # The dso are read in the same pass as the selection is resolved
+        standin_dsos, all_scene = standin_inventory.resolve_selection()
+        if all_scene:
+            standin_dsos = standin_inventory.get_dsos(
+                StaleReport.from_scene(version_index).get_stale_node_names(include_unresolved=True))
+        # The publish directories of the new standins are listed in parallel
+        version_index.warm([dso for name, dso in standin_dsos.items() if name not in previous_standins])
+        standins = {}
+        for name, dso in standin_dsos.items():
+            standin = previous_standins.get(name)
+            # The dso can have been changed by an undo or by hand since the standin was parsed
+            if standin is None or standin.get_dso() != dso:
+                standin = Standin(pm.PyNode(name))
+            if standin.is_valid() and (not all_scene or not standin.is_up_to_date()):
+                standins[name] = standin
+        return dict(sorted(standins.items()))
 
     def is_valid(self):
         """
@@ -48,6 +127,13 @@ class Standin:
         """
         return self.__object_name
 
+    def get_dso(self):
+        """
+        Getter of the dso the standin has been parsed from (or set to by the tool)
+        :return: dso
+        """
+        return self.__dso
+
     def get_standin_name(self):
         """
         Getter of standin name
@@ -55,6 +141,13 @@ class Standin:
         """
         return self.__standin_name
 
+    def get_publish_ass_dir(self):
+        """
+        Getter of the publish ass directory
+        :return: publish ass directory
+        """
+        return self.__publish_ass_dir
+
     def get_active_variant(self):
         """
         Getter of the active variant
@@ -81,14 +174,15 @@ class Standin:
         Get the last version
         :return: last version
         """
-        return self.__versions[self.__active_variant][0][0]
+        return self.__versions.last_version(self.__active_variant)
 
     def is_up_to_date(self):
         """
         Getter of whether the standin is up to date
         :return: is up to date
         """
-        return self.last_version() == self.__active_version
+        last_version = self.last_version()
+        return last_version is None or last_version == self.__active_version
 
     def set_active_variant_version(self, variant, version):
         """
@@ -97,14 +191,17 @@ class Standin:
         :param version
         :return:
         """
-        if self.__active_variant != variant or self.__active_version != version:
-            if len(variant) > 0 and len(version) > 0:
-                version_file = self.__publish_ass_dir + "/" + self.__standin_name + "_" + variant + "/" + version + "/" + \
-                               self.__standin_name + "_" + variant + ".ass"
-                if os.path.isfile(version_file):
-                    self.__standin.dso.set(version_file)
-                    self.__active_variant = variant
-                    self.__active_version = version
+        Standin.__apply_variants_versions([(self, variant, version)])
+
+    def __get_version_file(self, variant, version):
+        """
+        Get the ass file of a variant and a version
+        :param variant
+        :param version
+        :return: version file
+        """
+        return self.__publish_ass_dir + "/" + self.__standin_name + "_" + variant + "/" + version + "/" + \
+            self.__standin_name + "_" + variant + ".ass"
 
     def update_to_last(self):
         """
@@ -115,72 +212,317 @@ class Standin:
 
     def has_version_in_sd(self):
         """
-        Getter of whether the standin active variant is a SD
+        Getter of whether the standin active variant has a SD
         :return: has version in sd
         """
-        return self.__get_version_replaced("HD", "SD") is not None
+        return self.has_version_in_lod("SD")
 
     def has_version_in_hd(self):
         """
-        Getter of whether the standin active variant is a HD
+        Getter of whether the standin active variant has a HD
         :return: has version in hd
         """
-        return self.__get_version_replaced("SD", "HD") is not None
+        return self.has_version_in_lod("HD")
 
-    def __get_version_replaced(self, old_v, new_v):
+    def has_version_in_lod(self, lod):
         """
-        Get the version to replace
-        :param old_v: old version
-        :param new_v: new version
-        :return: active variant
+        Getter of whether the standin active variant has the active version in another level of detail
+        :param lod: level of detail (HD, SD, LD, PROXY)
+        :return: has version in lod
         """
-        if new_v in self.__active_variant: return None
-        variant = self.__active_variant.replace(old_v, new_v)
-        if variant in self.__versions.keys():
-            for version in self.__versions[variant]:
-                if self.__active_version == version[0]:
-                    return variant
-        return None
+        return self.__get_lod_variant(lod) is not None
+
+    def __get_lod_variant(self, lod):
+        """
+        Get the variant of a level of detail having the active version (read in the pairing of the asset)
+        :param lod: level of detail
+        :return: variant or None
+        """
+        if not self.__parse_valid:
+            return None
+        return self.__versions.get_lod_counterpart(self.__active_variant, self.__active_version, lod)
 
     def set_to_sd(self):
         """
         Set to a SD variant
         :return:
         """
-        variant = self.__get_version_replaced("HD", "SD")
-        if variant is not None:
-            self.set_active_variant_version(variant, self.__active_version)
+        self.set_to_lod("SD")
 
     def set_to_hd(self):
         """
         Set to a HD variant
         :return:
         """
-        variant = self.__get_version_replaced("SD", "HD")
+        self.set_to_lod("HD")
+
+    def set_to_lod(self, lod):
+        """
+        Set to the variant of a level of detail
+        :param lod: level of detail (HD, SD, LD, PROXY)
+        :return:
+        """
+        variant = self.__get_lod_variant(lod)
         if variant is not None:
             self.set_active_variant_version(variant, self.__active_version)
 
+    @staticmethod
+    def set_variant_version_all(standins, variant, version):
+        """
+        Set a new variant and version to many standins
+        :param standins
+        :param variant
+        :param version
+        :return:
+        """
+        Standin.__apply_variants_versions([(standin, variant, version) for standin in standins])
+
+    @staticmethod
+    def update_to_last_all(standins):
+        """
+        Update many standins to the last version of their current variant
+        :param standins
+        :return:
+        """
+        changes = []
+        for group in StandinGroup.group(standins):
+            last_version = group.last_version()
+            changes.extend([(standin, standin.__active_variant, last_version) for standin in group.get_standins()])
+        Standin.__apply_variants_versions(changes)
+
+    @staticmethod
+    def set_to_sd_all(standins):
+        """
+        Set many standins to a SD variant
+        :param standins
+        :return:
+        """
+        Standin.set_to_lod_all(standins, "SD")
+
+    @staticmethod
+    def set_to_hd_all(standins):
+        """
+        Set many standins to a HD variant
+        :param standins
+        :return:
+        """
+        Standin.set_to_lod_all(standins, "HD")
+
+    @staticmethod
+    def set_to_lod_all(standins, lod):
+        """
+        Set many standins to the variant of a level of detail (found once per group of identical standins)
+        :param standins
+        :param lod: level of detail (HD, SD, LD, PROXY)
+        :return:
+        """
+        changes = []
+        for group in StandinGroup.group(standins):
+            variant = group.get_representative().__get_lod_variant(lod)
+            if variant is not None:
+                version = group.get_active_version()
+                changes.extend([(standin, variant, version) for standin in group.get_standins()])
+        Standin.__apply_variants_versions(changes)
+
+    @staticmethod
+    @Profiler.profiled("apply_variants_versions")
+    def __apply_variants_versions(changes):
+        """
+        Set new variants and versions to standins in one undo chunk. The versions incomplete are skipped, each one
+        is checked only once and the viewport is not refreshed until all the standins are set
+        :param changes: list of (standin, variant, version)
+        :return:
+        """
+        # Version file -> version dir and file base (None if not recorded by the index)
+        version_dirs = {}
+        changes_to_check = []
+        for standin, variant, version in changes:
+            if variant is None or version is None or len(variant) == 0 or len(version) == 0:
+                continue
+            if standin.__active_variant == variant and standin.__active_version == version:
+                continue
+            version_file = standin.__get_version_file(variant, version)
+            if version_file not in version_dirs:
+                version_dirs[version_file] = standin.__versions.get_version_dir(variant, version)
+            changes_to_check.append((standin, variant, version, version_file))
+        # The files of the versions are recorded by the index, the others are only checked to exist. Each batch is
+        # checked in parallel
+        version_index = VersionIndex.get_instance()
+        statuses = version_index.get_version_statuses(
+            [version_dir for version_dir in version_dirs.values() if version_dir is not None])
+        files_usable = {version_file: statuses[version_dir[0]].complete
+                        for version_file, version_dir in version_dirs.items() if version_dir is not None}
+        files_unknown = [version_file for version_file, version_dir in version_dirs.items() if version_dir is None]
+        if len(files_unknown) > 0:
+            files_usable.update(version_index.exists_all(files_unknown))
+        changes_valid = [change for change in changes_to_check if files_usable[change[3]]]
+
+        if len(changes_valid) == 0:
+            return
+        pm.undoInfo(openChunk=True, chunkName="Asset Loader")
+        pm.refresh(suspend=True)
+        try:
+            for standin, variant, version, version_file in changes_valid:
+                standin.__standin.dso.set(version_file)
+                standin.__dso = version_file
+                standin.__active_variant = variant
+                standin.__active_version = version
+        finally:
+            pm.refresh(suspend=False)
+            pm.undoInfo(closeChunk=True)
+
     def convert_to_maya(self):
         """
         Convert the standin to maya object
         :return:
         """
-        dso = self.__standin.dso.get()
-        maya_path = dso.replace(".ass", ".ma")
+        Standin.convert_all_to_maya([self], instance=False)
+
+    def __get_maya_path(self):
+        """
+        Getter of the maya file of the active version
+        :return: maya path
+        """
+        return self.__standin.dso.get().replace(".ass", ".ma")
 
+    @staticmethod
+    def __reference_maya_file(maya_path, edits=None):
+        """
+        Reference a maya file
+        :param maya_path
+        :param edits: functions undoing the edits of the scene, to fill
+        :return: root node of the reference
+        """
         filename = os.path.basename(maya_path)
         name, ext = os.path.splitext(filename)
         name_space = name + "_00"
         namespace_for_creation = name_space.replace(".", "_")
 
         refNode = pm.system.createReference(maya_path, namespace=namespace_for_creation)
+        if edits is not None:
+            edits.append(refNode.remove)
         nodes = pm.FileReference.nodes(refNode)
+        return nodes[0]
+
+    def __place_maya_node(self, node, edits=None):
+        """
+        Place a maya node at the location of the standin in the DAG and in the scene and hide the standin
+        :param node
+        :param edits: functions undoing the edits of the scene, to fill
+        :return:
+        """
         transform = self.__standin.getParent()
         trsf_parent = transform.getParent()
         if trsf_parent:
-            pm.group(nodes[0], parent=trsf_parent)
+            group = pm.group(node, parent=trsf_parent)
+            if edits is not None:
+                # The node can be a referenced one so the group is removed without deleting its children
+                edits.append(partial(pm.ungroup, group))
 
         m = pm.xform(transform, matrix=True, query=True)
-        pm.xform(nodes[0], matrix=m)
+        pm.xform(node, matrix=m)
 
         transform.visibility.set(False)
+        if edits is not None:
+            edits.append(partial(transform.visibility.set, True))
+
+    @staticmethod
+    def __undo_edits(edits):
+        """
+        Undo the edits of the scene of a conversion that has failed, the last one first
+        :param edits: functions undoing the edits
+        :return:
+        """
+        for undo_edit in reversed(edits):
+            try:
+                undo_edit()
+            except Exception as e:
+                pm.warning("Asset Loader : conversion not fully undone : " + str(e))
+
+    @staticmethod
+    def group_by_maya_path(standins):
+        """
+        Group standins by the maya file of their active version
+        :param standins
+        :return: maya path -> standins
+        """
+        standins_by_maya_path = {}
+        for standin in standins:
+            standins_by_maya_path.setdefault(standin.__get_maya_path(), []).append(standin)
+        return standins_by_maya_path
+
+    @staticmethod
+    def __create_maya_nodes(maya_path, standins, instance, root=None, edits=None):
+        """
+        Create the maya nodes of standins using the same maya file
+        :param maya_path
+        :param standins
+        :param instance: whether the standins share one reference
+        :param root: root node of a reference of the maya file already created for other standins
+        :param edits: functions undoing the edits of the scene, to fill
+        :return: list of (node, standin) to place and root node of the reference
+        """
+        placements = []
+        for standin in standins:
+            if root is None or not instance:
+                root = Standin.__reference_maya_file(maya_path, edits)
+                placements.append((root, standin))
+            else:
+                node = pm.instance(root)[0]
+                if edits is not None:
+                    edits.append(partial(pm.delete, node))
+                placements.append((node, standin))
+        return placements, root
+
+    @staticmethod
+    def convert_maya_file_to_maya(maya_path, standins, instance=True, root=None):
+        """
+        Convert standins using the same existing maya file, without opening an undo chunk (for the conversions done
+        by chunks). If the conversion fails the references and nodes created are removed and the standins shown
+        again before the error is raised, so the standins are either all converted or untouched
+        :param maya_path
+        :param standins
+        :param instance: whether the standins share one reference
+        :param root: root node of a reference of the maya file already created for other standins
+        :return: root node of the reference to give for the next standins of the maya file
+        """
+        edits = []
+        try:
+            placements, root = Standin.__create_maya_nodes(maya_path, standins, instance, root, edits)
+            for node, standin in placements:
+                standin.__place_maya_node(node, edits)
+        except Exception:
+            Standin.__undo_edits(edits)
+            raise
+        return root
+
+    @staticmethod
+    @Profiler.profiled("convert_all_to_maya")
+    def convert_all_to_maya(standins, instance=True):
+        """
+        Convert many standins to maya objects in one undo chunk. The .ma files are checked in one batch before any
+        edit of the scene and each .ma file is referenced once then instanced for the other standins using it
+        :param standins
+        :param instance: whether the standins using the same .ma file share one reference
+        :return: standins not converted because their .ma file doesn't exist
+        """
+        standins_by_maya_path = Standin.group_by_maya_path(standins)
+        maya_paths_exist = VersionIndex.get_instance().exists_all(list(standins_by_maya_path.keys()))
+
+        standins_failed = []
+        placements = []
+        pm.undoInfo(openChunk=True, chunkName="Asset Loader Convert")
+        pm.refresh(suspend=True)
+        try:
+            for maya_path, maya_path_standins in standins_by_maya_path.items():
+                if not maya_paths_exist[maya_path]:
+                    standins_failed.extend(maya_path_standins)
+                    continue
+                placements.extend(Standin.__create_maya_nodes(maya_path, maya_path_standins, instance)[0])
+            # The transforms are applied in one pass once every node is created
+            for node, standin in placements:
+                standin.__place_maya_node(node)
+        finally:
+            pm.refresh(suspend=False)
+            pm.undoInfo(closeChunk=True)
+        return standins_failed
@@ -0,0 +1,132 @@
+# ######################################################################################################################
+
+class StandinGroup:
+    """
+    Group of standins sharing the same publish directory, asset, variant and version. The states of the group are
+    computed once for all its instances
+    """
+
+    def __init__(self, standins):
+        """
+        Constructor
+        :param standins: standins with the same asset, variant and version
+        """
+        self.__standins = standins
+        self.__representative = standins[0]
+        self.__up_to_date = None
+        # Level of detail -> whether the active variant has it
+        self.__has_version_in_lod = {}
+
+    @staticmethod
+    def get_key(standin):
+        """
+        Getter of the key identifying the standins of a group
+        :param standin
+        :return: key
+        """
+        # Assets of the same name can be published in several libraries
+        return standin.get_publish_ass_dir(), standin.get_standin_name(), standin.get_active_variant(), \
+            standin.get_active_version()
+
+    @staticmethod
+    def group(standins):
+        """
+        Group the standins by publish directory, asset, variant and version
+        :param standins
+        :return: groups
+        """
+        standins_by_key = {}
+        for standin in standins:
+            standins_by_key.setdefault(StandinGroup.get_key(standin), []).append(standin)
+        return [StandinGroup(group_standins) for group_standins in standins_by_key.values()]
+
+    def get_standins(self):
+        """
+        Getter of the standins of the group
+        :return: standins
+        """
+        return self.__standins
+
+    def get_representative(self):
+        """
+        Getter of the standin representing the group
+        :return: standin
+        """
+        return self.__representative
+
+    def get_object_name(self):
+        """
+        Getter of the object name (with the number of instances)
+        :return: object name
+        """
+        if len(self.__standins) == 1:
+            return self.__representative.get_object_name()
+        return self.__representative.get_object_name() + " (x" + str(len(self.__standins)) + ")"
+
+    def get_standin_name(self):
+        """
+        Getter of standin name
+        :return: standin name
+        """
+        return self.__representative.get_standin_name()
+
+    def get_active_variant(self):
+        """
+        Getter of the active variant
+        :return: active variant
+        """
+        return self.__representative.get_active_variant()
+
+    def get_active_version(self):
+        """
+        Getter of the active version
+        :return: active version
+        """
+        return self.__representative.get_active_version()
+
+    def get_versions(self):
+        """
+        Getter of the variants and versions
+        :return: variants and versions
+        """
+        return self.__representative.get_versions()
+
+    def last_version(self):
+        """
+        Get the last version
+        :return: last version
+        """
+        return self.__representative.last_version()
+
+    def is_up_to_date(self):
+        """
+        Getter of whether the standins are up to date
+        :return: is up to date
+        """
+        if self.__up_to_date is None:
+            self.__up_to_date = self.__representative.is_up_to_date()
+        return self.__up_to_date
+
+    def has_version_in_sd(self):
+        """
+        Getter of whether the standins active variant has a SD
+        :return: has version in sd
+        """
+        return self.has_version_in_lod("SD")
+
+    def has_version_in_hd(self):
+        """
+        Getter of whether the standins active variant has a HD
+        :return: has version in hd
+        """
+        return self.has_version_in_lod("HD")
+
+    def has_version_in_lod(self, lod):
+        """
+        Getter of whether the standins active variant has another level of detail
+        :param lod: level of detail
+        :return: has version in lod
+        """
+        if lod not in self.__has_version_in_lod:
+            self.__has_version_in_lod[lod] = self.__representative.has_version_in_lod(lod)
+        return self.__has_version_in_lod[lod]
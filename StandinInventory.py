@@ -0,0 +1,298 @@
+import maya.OpenMaya as OpenMaya
+
+# ######################################################################################################################
+
+_STANDIN_TYPE = "aiStandIn"
+
+
+# ######################################################################################################################
+
+class StandinInventory:
+    """
+    Inventory of the standins of the scene built in one OpenMaya iterator pass over the plugin shapes. Every standin is
+    mapped from itself, its transform, the ancestors of its transform and its proxies so a selection is resolved with
+    dictionary lookups. The standins created or deleted are added or removed in place, the inventory is rebuilt
+    lazily only when a node it maps is renamed or reparented
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.__dirty = True
+        # Standin name -> MDagPath
+        self.__standin_paths = {}
+        # Node name -> standin names (dict used as an ordered set, a group can hold every standin of the scene)
+        self.__standins_by_node = {}
+        # Standin name -> names of the nodes it is mapped from (to remove it)
+        self.__nodes_by_standin = {}
+        # Hash code of a standin node -> standin names (one per DAG path)
+        self.__standins_by_handle = {}
+        # Hash code of a node mapped -> node names (one per DAG path)
+        self.__nodes_by_handle = {}
+        # Standin nodes created since the last query (MObjectHandle), mapped once they are parented
+        self.__standins_added = []
+        self.__callback_ids = []
+
+    def add_callbacks(self):
+        """
+        Track the standins created or deleted and the changes of the DAG that concern the nodes mapped
+        :return:
+        """
+        if len(self.__callback_ids) > 0:
+            return
+        self.__callback_ids = [
+            OpenMaya.MDGMessage.addNodeAddedCallback(self.__on_standin_added, _STANDIN_TYPE),
+            OpenMaya.MDGMessage.addNodeRemovedCallback(self.__on_dag_node_removed, "dagNode"),
+            OpenMaya.MDagMessage.addAllDagChangesCallback(self.__on_dag_changed),
+            OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject(), self.__on_name_changed),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kBeforeNew, self.__on_scene_replaced),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kBeforeOpen, self.__on_scene_replaced),
+        ]
+
+    def remove_callbacks(self):
+        """
+        Stop tracking the changes of the DAG
+        :return:
+        """
+        for callback_id in self.__callback_ids:
+            OpenMaya.MMessage.removeCallback(callback_id)
+        self.__callback_ids = []
+        # Without callbacks the inventory can't be trusted anymore
+        self.__dirty = True
+
+    @staticmethod
+    def __get_hash(node):
+        """
+        Getter of the hash code of a node (stable while the node exists)
+        :param node: MObject
+        :return: hash code
+        """
+        return OpenMaya.MObjectHandle(node).hashCode()
+
+    def __is_mapped(self, node):
+        """
+        Getter of whether a node is mapped by the inventory
+        :param node: MObject
+        :return: is mapped
+        """
+        return StandinInventory.__get_hash(node) in self.__nodes_by_handle
+
+    def __on_scene_replaced(self, *args):
+        """
+        On scene replaced the inventory will be rebuilt on the next query
+        :return:
+        """
+        self.__dirty = True
+
+    def __on_standin_added(self, node, *args):
+        """
+        On standin created it is mapped on the next query (its DAG path is not set yet)
+        :param node
+        :return:
+        """
+        if not self.__dirty:
+            self.__standins_added.append(OpenMaya.MObjectHandle(node))
+
+    def __on_dag_node_removed(self, node, *args):
+        """
+        On DAG node deleted remove it from the inventory, with its standins if it is a standin
+        :param node
+        :return:
+        """
+        if self.__dirty:
+            return
+        handle_hash = StandinInventory.__get_hash(node)
+        for standin_name in self.__standins_by_handle.pop(handle_hash, ()):
+            self.__remove_standin(standin_name)
+        for node_name in self.__nodes_by_handle.pop(handle_hash, ()):
+            self.__standins_by_node.pop(node_name, None)
+
+    def __on_dag_changed(self, msg_type, child, parent, *args):
+        """
+        On DAG changed the inventory will be rebuilt on the next query if a node mapped has been reparented or has
+        got a new child
+        :param msg_type
+        :param child: MDagPath
+        :param parent: MDagPath
+        :return:
+        """
+        if self.__dirty:
+            return
+        try:
+            if self.__is_mapped(child.node()) or self.__is_mapped(parent.node()):
+                self.__dirty = True
+        except RuntimeError:
+            self.__dirty = True
+
+    def __on_name_changed(self, node, prev_name, *args):
+        """
+        On node renamed the inventory will be rebuilt on the next query if the node is mapped
+        :param node
+        :param prev_name
+        :return:
+        """
+        if not self.__dirty and self.__is_mapped(node):
+            self.__dirty = True
+
+    def __add_node(self, path, standin_name):
+        """
+        Map a node to a standin
+        :param path: MDagPath of the node
+        :param standin_name
+        :return:
+        """
+        node_name = path.partialPathName()
+        if node_name not in self.__standins_by_node:
+            self.__standins_by_node[node_name] = {}
+            self.__nodes_by_handle.setdefault(StandinInventory.__get_hash(path.node()), set()).add(node_name)
+        self.__standins_by_node[node_name][standin_name] = None
+        self.__nodes_by_standin.setdefault(standin_name, []).append(node_name)
+
+    def __add_standin(self, path):
+        """
+        Map a standin from itself, its transform, the ancestors of its transform and its proxies
+        :param path: MDagPath of the standin
+        :return:
+        """
+        standin_name = path.partialPathName()
+        self.__standin_paths[standin_name] = path
+        self.__standins_by_handle.setdefault(StandinInventory.__get_hash(path.node()), []).append(standin_name)
+        self.__add_node(path, standin_name)
+        # The transform of the standin and all its ancestors
+        transform_path = OpenMaya.MDagPath(path)
+        transform_path.pop()
+        ancestor_path = OpenMaya.MDagPath(transform_path)
+        while ancestor_path.length() > 0:
+            self.__add_node(ancestor_path, standin_name)
+            ancestor_path.pop()
+        # The transforms under the transform of the standin are its proxies
+        for child_index in range(transform_path.childCount()):
+            child = transform_path.child(child_index)
+            if child.hasFn(OpenMaya.MFn.kTransform):
+                child_path = OpenMaya.MDagPath(transform_path)
+                child_path.push(child)
+                self.__add_node(child_path, standin_name)
+
+    def __remove_standin(self, standin_name):
+        """
+        Remove a standin from the inventory
+        :param standin_name
+        :return:
+        """
+        for node_name in self.__nodes_by_standin.pop(standin_name, ()):
+            standin_names = self.__standins_by_node.get(node_name)
+            if standin_names is not None:
+                standin_names.pop(standin_name, None)
+                if len(standin_names) == 0:
+                    del self.__standins_by_node[node_name]
+        self.__standin_paths.pop(standin_name, None)
+
+    def __build(self):
+        """
+        Build the inventory in one pass over the plugin shapes of the DAG
+        :return:
+        """
+        self.__standin_paths = {}
+        self.__standins_by_node = {}
+        self.__nodes_by_standin = {}
+        self.__standins_by_handle = {}
+        self.__nodes_by_handle = {}
+        self.__standins_added = []
+        it = OpenMaya.MItDag(OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kPluginShape)
+        while not it.isDone():
+            path = OpenMaya.MDagPath()
+            it.getPath(path)
+            if OpenMaya.MFnDagNode(path).typeName() == _STANDIN_TYPE:
+                self.__add_standin(path)
+            it.next()
+        self.__dirty = False
+
+    def __add_standins_added(self):
+        """
+        Map the standins created since the last query
+        :return:
+        """
+        for handle in self.__standins_added:
+            if not handle.isValid():
+                # Deleted meanwhile
+                continue
+            path = OpenMaya.MDagPath()
+            OpenMaya.MDagPath.getAPathTo(handle.object(), path)
+            if path.partialPathName() not in self.__standin_paths:
+                self.__add_standin(path)
+        self.__standins_added = []
+
+    def __ensure_built(self):
+        """
+        Rebuild the inventory if a node mapped has changed (or if the changes are not tracked), otherwise map the
+        standins created
+        :return:
+        """
+        if self.__dirty or len(self.__callback_ids) == 0:
+            self.__build()
+        elif len(self.__standins_added) > 0:
+            self.__add_standins_added()
+
+    def get_standin_names(self):
+        """
+        Getter of the names of all the standins of the scene
+        :return: standin names
+        """
+        self.__ensure_built()
+        return list(self.__standin_paths.keys())
+
+    def resolve_selection(self):
+        """
+        Resolve the active selection to standins and read their dso in the same pass
+        :return: standin name -> dso and whether the selection is empty
+        """
+        selection = OpenMaya.MSelectionList()
+        OpenMaya.MGlobal.getActiveSelectionList(selection)
+        if selection.length() == 0:
+            return {}, True
+        self.__ensure_built()
+        standin_names = {}
+        for index in range(selection.length()):
+            path = OpenMaya.MDagPath()
+            try:
+                selection.getDagPath(index, path)
+            except RuntimeError:
+                # Not a DAG node
+                continue
+            standin_names.update(self.__standins_by_node.get(path.partialPathName(), {}))
+        return self.__read_dsos(standin_names.keys()), False
+
+    def get_dso(self, standin_name):
+        """
+        Getter of the dso of a standin
+        :param standin_name
+        :return: dso
+        """
+        self.__ensure_built()
+        return OpenMaya.MFnDagNode(self.__standin_paths[standin_name]).findPlug("dso").asString()
+
+    def __read_dsos(self, standin_names):
+        """
+        Read the dso of standins of the inventory built
+        :param standin_names
+        :return: standin name -> dso
+        """
+        fn_dag_node = OpenMaya.MFnDagNode()
+        dsos = {}
+        for standin_name in standin_names:
+            path = self.__standin_paths.get(standin_name)
+            if path is None:
+                continue
+            fn_dag_node.setObject(path)
+            dsos[standin_name] = fn_dag_node.findPlug("dso").asString()
+        return dsos
+
+    def get_dsos(self, standin_names=None):
+        """
+        Getter of the dso of many standins with the inventory built once (even if the changes are not tracked)
+        :param standin_names: standin names or None for all the standins of the scene
+        :return: standin name -> dso
+        """
+        self.__ensure_built()
+        return self.__read_dsos(self.__standin_paths.keys() if standin_names is None else standin_names)
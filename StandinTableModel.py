@@ -0,0 +1,184 @@
+from PySide2.QtCore import *
+from PySide2.QtGui import *
+
+from .StandinGroup import *
+
+# ######################################################################################################################
+
+_HEADERS = ["Name", "Asset", "Variant", "Version"]
+
+
+# ######################################################################################################################
+
+class StandinTableModel(QAbstractTableModel):
+    """
+    Model of the standins table. The data of the rows are computed lazily when the view displays them
+    """
+
+    def __init__(self, asset_path, parent=None):
+        """
+        Constructor
+        :param asset_path: path of the assets of the tool
+        :param parent
+        """
+        super(StandinTableModel, self).__init__(parent)
+        # Rows are standins or groups of identical standins
+        self.__standins = []
+        self.__grouped = False
+        # Icons loaded once
+        self.__valid_icon = QIcon(asset_path + "/valid.png")
+        self.__warning_icon = QIcon(asset_path + "/warning.png")
+
+    def rowCount(self, parent=QModelIndex()):
+        """
+        Getter of the number of rows
+        :param parent
+        :return: number of rows
+        """
+        return 0 if parent.isValid() else len(self.__standins)
+
+    def columnCount(self, parent=QModelIndex()):
+        """
+        Getter of the number of columns
+        :param parent
+        :return: number of columns
+        """
+        return 0 if parent.isValid() else len(_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """
+        Getter of the header data
+        :param section
+        :param orientation
+        :param role
+        :return: header data
+        """
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return _HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        """
+        Getter of the data of a cell
+        :param index
+        :param role
+        :return: data
+        """
+        if not index.isValid():
+            return None
+        standin = self.__standins[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return standin.get_object_name()
+            if column == 1:
+                return standin.get_standin_name()
+            if column == 2:
+                return standin.get_active_variant()
+            if standin.is_up_to_date():
+                return standin.get_active_version()
+            return standin.get_active_version() + " -> " + standin.last_version()
+        if role == Qt.DecorationRole and column == 0:
+            return self.__valid_icon if standin.is_up_to_date() else self.__warning_icon
+        if role == Qt.TextAlignmentRole and column > 0:
+            return Qt.AlignCenter
+        if role == Qt.UserRole:
+            return standin
+        return None
+
+    def is_grouped(self):
+        """
+        Getter of whether the identical standins are displayed in one row
+        :return: is grouped
+        """
+        return self.__grouped
+
+    def set_grouped(self, grouped, standins):
+        """
+        Setter of whether the identical standins are displayed in one row
+        :param grouped
+        :param standins: standins sorted
+        :return:
+        """
+        self.__grouped = grouped
+        self.beginResetModel()
+        self.__standins = []
+        self.endResetModel()
+        self.set_standins(standins)
+
+    def get_standins_of_row(self, row):
+        """
+        Getter of the standins of a row
+        :param row
+        :return: standins
+        """
+        if self.__grouped:
+            return self.__standins[row].get_standins()
+        return [self.__standins[row]]
+
+    def get_rows(self):
+        """
+        Getter of the rows (standins or groups of standins)
+        :return: rows
+        """
+        return self.__standins
+
+    def set_standins(self, standins):
+        """
+        Setter of the standins. Only the rows of the standins added or removed are inserted or removed
+        :param standins: standins sorted
+        :return: rows inserted
+        """
+        if self.__grouped:
+            # The groups change with the standins so they are all rebuilt
+            self.beginResetModel()
+            self.__standins = StandinGroup.group(standins)
+            self.endResetModel()
+            return list(range(len(self.__standins)))
+
+        standins_set = set(standins)
+        # Remove the rows of the standins that are not retrieved anymore (by blocks of consecutive rows)
+        row = len(self.__standins) - 1
+        while row >= 0:
+            if self.__standins[row] in standins_set:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and self.__standins[row] not in standins_set:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self.__standins[row + 1:last + 1]
+            self.endRemoveRows()
+
+        # The rows kept are still sorted so the new standins are inserted (by blocks) where the rows don't match
+        rows_inserted = []
+        row = 0
+        while row < len(standins):
+            if row < len(self.__standins) and self.__standins[row] is standins[row]:
+                row += 1
+                continue
+            standin_kept = self.__standins[row] if row < len(self.__standins) else None
+            last = row
+            while last + 1 < len(standins) and standins[last + 1] is not standin_kept:
+                last += 1
+            self.beginInsertRows(QModelIndex(), row, last)
+            self.__standins[row:row] = standins[row:last + 1]
+            self.endInsertRows()
+            rows_inserted.extend(range(row, last + 1))
+            row = last + 1
+        return rows_inserted
+
+    def refresh_standins(self, standins):
+        """
+        Notify the view that the data of some standins have changed
+        :param standins: standins edited
+        :return:
+        """
+        if self.__grouped:
+            # Already rebuilt with the standins
+            return
+        standins_set = set(standins)
+        last_column = len(_HEADERS) - 1
+        for row, standin in enumerate(self.__standins):
+            if standin in standins_set:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
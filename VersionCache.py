@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+
+from common.Prefs import *
+
+# ######################################################################################################################
+
+_FILE_NAME_VERSION_CACHE = "asset_loader_versions"
+# Directories not used for this number of days are forgotten
+_MAX_AGE_DAYS = 30
+# Directories kept at most (the least recently used are forgotten first)
+_MAX_DIRS = 20000
+
+
+# ######################################################################################################################
+
+class VersionCache:
+    """
+    Persistent cache of the publish directories listings, validated with the mtime of each directory. The directories
+    not used recently are forgotten when it is loaded. It is filled by the threads listing the directories so every
+    access is done holding its lock
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # Stored next to the preferences of the tools (common preferences on all illogic tools)
+        self.__prefs = Prefs(_FILE_NAME_VERSION_CACHE)
+        self.__dirs = dict(self.__prefs["dirs"]) if "dirs" in self.__prefs else {}
+        self.__names = dict(self.__prefs["names"]) if "names" in self.__prefs else {}
+        # Only the complete versions are stored, a published version doesn't change anymore
+        self.__statuses = dict(self.__prefs["statuses"]) if "statuses" in self.__prefs else {}
+        self.__dirty = False
+        self.__lock = threading.Lock()
+        self.__evict()
+
+    @staticmethod
+    def __get_day():
+        """
+        Getter of the current day (the directories used are dated by day so a hit doesn't always dirty the cache)
+        :return: day
+        """
+        return int(time.time() // 86400)
+
+    def __evict(self):
+        """
+        Forget the directories not used recently, with the statuses of their versions and the standin names of the
+        publish directories forgotten, so the cache doesn't grow forever
+        :return:
+        """
+        today = VersionCache.__get_day()
+        for cached in self.__dirs.values():
+            # Listings cached before the dates were recorded
+            cached.setdefault("used", today)
+        used_dirs = sorted(((cached["used"], path) for path, cached in self.__dirs.items()
+                            if today - cached["used"] <= _MAX_AGE_DAYS), reverse=True)[:_MAX_DIRS]
+        if len(used_dirs) == len(self.__dirs):
+            return
+        self.__dirs = {path: self.__dirs[path] for _, path in used_dirs}
+        self.__statuses = {version_dir: status for version_dir, status in self.__statuses.items()
+                           if os.path.dirname(version_dir) in self.__dirs}
+        self.__names = {publish_ass_dir: names for publish_ass_dir, names in self.__names.items()
+                        if publish_ass_dir in self.__dirs}
+        self.__dirty = True
+
+    def get_entries(self, path, mtime):
+        """
+        Getter of the listing of a directory if it hasn't changed since it has been cached
+        :param path
+        :param mtime: current mtime of the directory
+        :return: entries or None if not cached or outdated
+        """
+        with self.__lock:
+            cached = self.__dirs.get(path)
+            if cached is None or cached["mtime"] != mtime:
+                return None
+            today = VersionCache.__get_day()
+            if cached["used"] != today:
+                cached["used"] = today
+                self.__dirty = True
+            return cached["entries"]
+
+    def set_entries(self, path, mtime, entries):
+        """
+        Setter of the listing of a directory
+        :param path
+        :param mtime: mtime of the directory when listed
+        :param entries
+        :return:
+        """
+        with self.__lock:
+            self.__dirs[path] = {"mtime": mtime, "entries": list(entries), "used": VersionCache.__get_day()}
+            self.__dirty = True
+
+    def get_status(self, version_dir):
+        """
+        Getter of the files of a complete version
+        :param version_dir
+        :return: ass size, has ma and complete or None if not cached
+        """
+        with self.__lock:
+            return self.__statuses.get(version_dir)
+
+    def set_status(self, version_dir, status):
+        """
+        Setter of the files of a complete version
+        :param version_dir
+        :param status: ass size, has ma and complete
+        :return:
+        """
+        with self.__lock:
+            self.__statuses[version_dir] = status
+            self.__dirty = True
+
+    def get_standin_names(self, publish_ass_dir):
+        """
+        Getter of the standin names known in a publish directory
+        :param publish_ass_dir
+        :return: standin names
+        """
+        with self.__lock:
+            return list(self.__names.get(publish_ass_dir, []))
+
+    def add_standin_name(self, publish_ass_dir, standin_name):
+        """
+        Add a standin name known in a publish directory
+        :param publish_ass_dir
+        :param standin_name
+        :return:
+        """
+        with self.__lock:
+            names = self.__names.setdefault(publish_ass_dir, [])
+            if standin_name not in names:
+                names.append(standin_name)
+                self.__dirty = True
+
+    def save(self):
+        """
+        Save the cache if it has changed (the listings still running wait for the end of the save)
+        :return:
+        """
+        with self.__lock:
+            if self.__dirty:
+                self.__prefs["dirs"] = self.__dirs
+                self.__prefs["names"] = self.__names
+                self.__prefs["statuses"] = self.__statuses
+                self.__dirty = False
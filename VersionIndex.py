@@ -0,0 +1,554 @@
+import os
+import sys
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+from .PublishBackend import *
+
+# ######################################################################################################################
+
+_ASS_EXTENSION = ".ass"
+# Number of threads listing the publish directories in the warm-up (parallel readdirs cost about one on the filers)
+_LISTING_WORKERS = 8
+
+
+# ######################################################################################################################
+
+class AssetVersions(Mapping):
+    """
+    Variants and versions of an asset (variant -> [(version, ass file)] with the last version first).
+    The variants are listed at construction and the versions of a variant only when they are needed.
+    The table is shared by all the standins of the asset so it is read only and its strings are interned
+    """
+    __slots__ = ("__publish_ass_dir", "__standin_name", "__list_variants", "__list_versions", "__get_version_status",
+                 "__get_version_statuses", "__variants", "__variants_set", "__versions", "__last_versions",
+                 "__lod_pairs", "__version_sets")
+
+    def __init__(self, publish_ass_dir, standin_name, list_variants=None, list_versions=None, versions=None,
+                 get_version_status=None, get_version_statuses=None):
+        """
+        Constructor
+        :param publish_ass_dir
+        :param standin_name
+        :param list_variants: function listing the variant directories of a publish directory (sorted)
+        :param list_versions: function listing the versions of a variant directory (sorted)
+        :param versions: variants and versions already listed (used instead of the listing functions)
+        :param get_version_status: function giving the VersionStatus of a version directory and a file base name
+        :param get_version_statuses: function giving the VersionStatus of many (version directory, file base name)
+        """
+        self.__publish_ass_dir = publish_ass_dir
+        self.__standin_name = standin_name
+        self.__list_variants = list_variants
+        self.__list_versions = list_versions
+        self.__get_version_status = get_version_status
+        self.__get_version_statuses = get_version_statuses
+        self.__variants = []
+        self.__variants_set = set()
+        self.__versions = {}
+        self.__last_versions = {}
+        # Variant -> {level of detail : counterpart variant} (computed with the variants)
+        self.__lod_pairs = {}
+        # Variant -> set of its versions (to check the counterparts)
+        self.__version_sets = {}
+        if versions is not None:
+            self.__variants = tuple(sys.intern(variant) for variant in versions.keys())
+            self.__variants_set = frozenset(self.__variants)
+            self.__versions = {sys.intern(variant): tuple((sys.intern(version[0]),) + tuple(version[1:])
+                                                          for version in variant_versions)
+                               for variant, variant_versions in versions.items()}
+            self.__lod_pairs = get_lod_pairs(self.__variants)
+        else:
+            self.reload()
+
+    def reload(self):
+        """
+        List the variants again and forget the versions listed
+        :return:
+        """
+        if self.__list_variants is None:
+            return
+        prefix = self.__standin_name + "_"
+        self.__variants = tuple(sys.intern(variant_dir_name[len(prefix):])
+                                for variant_dir_name in self.__list_variants(self.__publish_ass_dir)
+                                if variant_dir_name.startswith(prefix) and len(variant_dir_name) > len(prefix))
+        self.__variants_set = frozenset(self.__variants)
+        self.__versions = {}
+        self.__last_versions = {}
+        self.__lod_pairs = get_lod_pairs(self.__variants)
+        self.__version_sets = {}
+
+    def __get_variant_dir_name(self, variant):
+        """
+        Getter of the name of the directory of a variant
+        :param variant
+        :return: variant dir name
+        """
+        return self.__standin_name + "_" + variant
+
+    def __getitem__(self, variant):
+        """
+        Getter of the versions of a variant (listed once)
+        :param variant
+        :return: tuple of (version, ass file) with the last version first
+        """
+        if variant not in self.__variants_set:
+            raise KeyError(variant)
+        if variant not in self.__versions:
+            variant_dir_name = self.__get_variant_dir_name(variant)
+            variant_dir = self.__publish_ass_dir + "/" + variant_dir_name
+            self.__versions[variant] = tuple(
+                (version, variant_dir + "/" + version + "/" + variant_dir_name + _ASS_EXTENSION)
+                for version in reversed(self.__list_versions(variant_dir)))
+        return self.__versions[variant]
+
+    def __iter__(self):
+        return iter(self.__variants)
+
+    def __len__(self):
+        return len(self.__variants)
+
+    def __contains__(self, variant):
+        return variant in self.__variants_set
+
+    def get_status(self, variant, version):
+        """
+        Getter of the files of a version (recorded once by the index)
+        :param variant
+        :param version
+        :return: VersionStatus or None if unknown
+        """
+        version_dir = self.get_version_dir(variant, version)
+        return self.__get_version_status(*version_dir) if version_dir is not None else None
+
+    def get_version_dir(self, variant, version):
+        """
+        Getter of the directory of a version whose files are recorded by the index, to check many versions at once
+        :param variant
+        :param version
+        :return: version dir and file base or None if the files are unknown
+        """
+        if self.__get_version_status is None or variant not in self.__variants_set:
+            return None
+        variant_dir_name = self.__get_variant_dir_name(variant)
+        return self.__publish_ass_dir + "/" + variant_dir_name + "/" + version, variant_dir_name
+
+    def get_statuses(self, variant, versions):
+        """
+        Getter of the files of many versions of a variant, checked at once
+        :param variant
+        :param versions
+        :return: version -> VersionStatus or None if unknown
+        """
+        if self.__get_version_statuses is None:
+            return {version: self.get_status(variant, version) for version in versions}
+        version_dirs = {version: self.get_version_dir(variant, version) for version in versions}
+        statuses = self.__get_version_statuses([version_dir for version_dir in version_dirs.values()
+                                                if version_dir is not None])
+        return {version: statuses[version_dir[0]] if version_dir is not None else None
+                for version, version_dir in version_dirs.items()}
+
+    def is_usable(self, variant, version):
+        """
+        Getter of whether a version has a complete .ass file
+        :param variant
+        :param version
+        :return: is usable (True if unknown)
+        """
+        status = self.get_status(variant, version)
+        return status is None or status.complete
+
+    def get_lod_counterpart(self, variant, version, lod):
+        """
+        Getter of the variant of another level of detail having the same version (the variants are paired once per
+        asset and the versions of each counterpart put in a set once)
+        :param variant
+        :param version
+        :param lod: level of detail (HD, SD, LD, PROXY)
+        :return: counterpart variant or None
+        """
+        counterpart = self.__lod_pairs.get(variant, {}).get(lod)
+        if counterpart is None:
+            return None
+        if counterpart not in self.__version_sets:
+            self.__version_sets[counterpart] = frozenset(version[0] for version in self[counterpart])
+        return counterpart if version in self.__version_sets[counterpart] else None
+
+    def last_version(self, variant):
+        """
+        Getter of the last usable version of a variant, read from the sorted listing of its directory. It is kept
+        until the table is reloaded (a version still being published is refreshed by the watcher of its directory)
+        :param variant
+        :return: last version or None if the variant has no usable version
+        """
+        if variant in self.__last_versions:
+            return self.__last_versions[variant]
+        if variant in self.__versions or self.__list_versions is None:
+            versions = [version[0] for version in self.__versions.get(variant, ())]
+        elif variant in self.__variants_set:
+            versions = reversed(self.__list_versions(self.__publish_ass_dir + "/" +
+                                                     self.__get_variant_dir_name(variant)))
+        else:
+            return None
+        last_version = None
+        for version in versions:
+            if self.is_usable(variant, version):
+                last_version = version
+                break
+        self.__last_versions[variant] = last_version
+        return last_version
+
+
+# ######################################################################################################################
+
+class VersionIndex:
+    """
+    Process-wide index of the variants and versions of the published assets.
+    Every Standin of the same asset share the same table so the publish directories are listed only once
+    """
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        """
+        Getter of the process-wide instance
+        :return: instance
+        """
+        if VersionIndex.__instance is None:
+            VersionIndex.__instance = VersionIndex()
+        return VersionIndex.__instance
+
+    @staticmethod
+    def reset_instance():
+        """
+        Replace the process-wide instance by an empty one (the standin names known are forgotten too)
+        :return: instance
+        """
+        VersionIndex.__instance = VersionIndex()
+        return VersionIndex.__instance
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # Optional persistent cache of the listings and of the standin names (VersionCache)
+        self.__cache = None
+        # Storage of the publishes
+        self.__backend = MemoizedBackend(FileSystemBackend())
+        # Publish ass dir -> standin names
+        self.__names = {}
+        # (Publish ass dir, standin name) -> variants and versions
+        self.__tables = {}
+        # The index can be warmed from a worker thread
+        self.__lock = threading.RLock()
+
+    def set_cache(self, cache):
+        """
+        Setter of the persistent cache of the listings
+        :param cache
+        :return:
+        """
+        with self.__lock:
+            self.__cache = cache
+            self.__backend.set_cache(cache)
+
+    def get_cache(self):
+        """
+        Getter of the persistent cache of the listings
+        :return: cache or None
+        """
+        return self.__cache
+
+    def set_backend(self, backend):
+        """
+        Setter of the storage of the publishes (the tables of the assets are built again)
+        :param backend: PublishBackend
+        :return:
+        """
+        with self.__lock:
+            backend.set_cache(self.__cache)
+            self.__backend = backend
+            self.__tables.clear()
+
+    def get_backend(self):
+        """
+        Getter of the storage of the publishes
+        :return: backend
+        """
+        return self.__backend
+
+    @staticmethod
+    def __key(path):
+        """
+        Normalize a directory path to be used as a key
+        :param path
+        :return: key
+        """
+        return path.replace("\\", "/").rstrip("/")
+
+    @staticmethod
+    def split_dso(dso):
+        """
+        Split a dso path at format <publish_ass_dir>/<asset>_<variant>/<version>/<asset>_<variant>.ass
+        :param dso
+        :return: publish ass dir, variant dir name and version or None if the path doesn't match the layout
+        """
+        if not dso:
+            return None
+        dso = dso.replace("\\", "/")
+        version_dir, filename = os.path.split(dso)
+        name, ext = os.path.splitext(filename)
+        variant_dir, version = os.path.split(version_dir)
+        publish_ass_dir, variant_dir_name = os.path.split(variant_dir)
+        if ext != _ASS_EXTENSION or name != variant_dir_name or len(version) == 0 or len(publish_ass_dir) == 0:
+            return None
+        return sys.intern(publish_ass_dir), sys.intern(variant_dir_name), sys.intern(version)
+
+    def __list_variants_locked(self, publish_ass_dir):
+        """
+        List the variant directories of a publish directory (for the tables of the assets)
+        :param publish_ass_dir
+        :return: variant directory names
+        """
+        with self.__lock:
+            return self.__backend.list_variants(publish_ass_dir)
+
+    def __list_versions_locked(self, variant_dir):
+        """
+        List the versions of a variant directory (for the versions listed lazily)
+        :param variant_dir
+        :return: versions
+        """
+        with self.__lock:
+            return self.__backend.list_versions(variant_dir)
+
+    def __get_version_status_locked(self, version_dir, file_base):
+        """
+        Getter of the files of a version directory (for the tables of the assets)
+        :param version_dir
+        :param file_base: <asset>_<variant>
+        :return: VersionStatus
+        """
+        with self.__lock:
+            return self.__backend.get_version_status(version_dir, file_base)
+
+    def __get_standin_names(self, publish_ass_dir):
+        """
+        Getter of the standin names known in a publish directory
+        :param publish_ass_dir
+        :return: standin names
+        """
+        if publish_ass_dir not in self.__names:
+            names = self.__cache.get_standin_names(publish_ass_dir) if self.__cache is not None else []
+            self.__names[publish_ass_dir] = list(names)
+        return self.__names[publish_ass_dir]
+
+    def find(self, publish_ass_dir, variant_dir_name):
+        """
+        Find the asset indexed that owns a variant directory
+        :param publish_ass_dir
+        :param variant_dir_name: <asset>_<variant>
+        :return: standin name and variants and versions or None if not indexed yet
+        """
+        with self.__lock:
+            publish_ass_dir = VersionIndex.__key(publish_ass_dir)
+            # The longest name wins if several assets share the same prefix
+            for standin_name in sorted(self.__get_standin_names(publish_ass_dir), key=len, reverse=True):
+                prefix = standin_name + "_"
+                if variant_dir_name.startswith(prefix):
+                    versions = self.get_versions(publish_ass_dir, standin_name)
+                    if variant_dir_name[len(prefix):] in versions:
+                        return standin_name, versions
+            return None
+
+    def add(self, publish_ass_dir, standin_name):
+        """
+        Index an asset of a publish directory
+        :param publish_ass_dir
+        :param standin_name
+        :return:
+        """
+        with self.__lock:
+            publish_ass_dir = VersionIndex.__key(publish_ass_dir)
+            names = self.__get_standin_names(publish_ass_dir)
+            if standin_name not in names:
+                names.append(standin_name)
+                if self.__cache is not None:
+                    self.__cache.add_standin_name(publish_ass_dir, standin_name)
+
+    def get_versions(self, publish_ass_dir, standin_name):
+        """
+        Getter of the variants and versions of an asset (built once and shared)
+        :param publish_ass_dir
+        :param standin_name
+        :return: variants and versions
+        """
+        with self.__lock:
+            publish_ass_dir = VersionIndex.__key(publish_ass_dir)
+            key = (publish_ass_dir, standin_name)
+            if key not in self.__tables:
+                self.__tables[key] = AssetVersions(publish_ass_dir, standin_name, self.__list_variants_locked,
+                                                   self.__list_versions_locked,
+                                                   get_version_status=self.__get_version_status_locked,
+                                                   get_version_statuses=self.get_version_statuses)
+            return self.__tables[key]
+
+    def list_versions(self, publish_ass_dir, variant_dir_name):
+        """
+        Getter of the versions of a variant directory (without knowing the standin name)
+        :param publish_ass_dir
+        :param variant_dir_name: <asset>_<variant>
+        :return: sorted versions
+        """
+        with self.__lock:
+            return self.__backend.list_versions(VersionIndex.__key(publish_ass_dir) + "/" + variant_dir_name)
+
+    def last_version(self, publish_ass_dir, variant_dir_name):
+        """
+        Getter of the last version of a variant directory (without knowing the standin name)
+        :param publish_ass_dir
+        :param variant_dir_name: <asset>_<variant>
+        :return: last usable version or None if the variant has no usable version
+        """
+        with self.__lock:
+            variant_dir = VersionIndex.__key(publish_ass_dir) + "/" + variant_dir_name
+            for version in reversed(self.__backend.list_versions(variant_dir)):
+                if self.__backend.get_version_status(variant_dir + "/" + version, variant_dir_name).complete:
+                    return version
+            return None
+
+    def refresh_dirs(self, dirs):
+        """
+        List again directories that have changed and update in place the tables of the assets concerned
+        :param dirs: publish ass directories or variant directories
+        :return: (publish ass dir, standin name) of the assets updated
+        """
+        with self.__lock:
+            dirs = set(VersionIndex.__key(directory) for directory in dirs)
+            self.__backend.refresh(dirs)
+            assets_updated = []
+            for key, versions in list(self.__tables.items()):
+                publish_ass_dir, standin_name = key
+                prefix = publish_ass_dir + "/" + standin_name + "_"
+                if publish_ass_dir not in dirs and not any(directory.startswith(prefix) for directory in dirs):
+                    continue
+                # The standins share the table so it is updated in place
+                versions.reload()
+                assets_updated.append(key)
+            return assets_updated
+
+    def get_changed_dirs(self):
+        """
+        Find the directories listed whose mtime has changed since. Can be called from a worker thread, the mtimes
+        are read without holding the index
+        :return: directories changed
+        """
+        with self.__lock:
+            backend = self.__backend
+            listed_mtimes = backend.get_listed_mtimes()
+        return [directory for directory, mtime in listed_mtimes.items() if backend.get_mtime(directory) != mtime]
+
+    def get_pending_dirs(self):
+        """
+        Getter of the version directories found incomplete, to watch until the end of their publish
+        :return: version directories
+        """
+        with self.__lock:
+            return self.__backend.get_pending_dirs()
+
+    @staticmethod
+    def __list_variant_dir(backend, publish_ass_dir, variant_dir_name, cancel_event):
+        """
+        List the publish directory and the variant directory of a dso and check its last version (in a thread of
+        the warm-up, the requests of the same directory are deduplicated by the backend)
+        :param backend
+        :param publish_ass_dir
+        :param variant_dir_name
+        :param cancel_event
+        :return:
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        backend.list_variants(publish_ass_dir)
+        variant_dir = publish_ass_dir + "/" + variant_dir_name
+        versions = backend.list_versions(variant_dir)
+        # The last version is usually the usable one
+        if len(versions) > 0:
+            backend.get_version_status(variant_dir + "/" + versions[-1], variant_dir_name)
+
+    def warm(self, dsos, cancel_event=None):
+        """
+        List the publish directories of dso paths so the standins parsed next don't have to access the disk.
+        The directories are listed by a bounded pool of threads then the tables of the assets are built from the
+        listings. Can be called from a worker thread
+        :param dsos
+        :param cancel_event: threading.Event stopping the warm-up when set
+        :return: whether every dso has been warmed
+        """
+        variant_dirs = set()
+        for dso in dsos:
+            layout = VersionIndex.split_dso(dso)
+            if layout is not None:
+                variant_dirs.add((VersionIndex.__key(layout[0]), layout[1]))
+        variant_dirs = sorted(variant_dirs)
+        with self.__lock:
+            backend = self.__backend
+        with Profiler.get_instance().timed("warm_listings", dirs=len(variant_dirs)):
+            if len(variant_dirs) <= 1:
+                for publish_ass_dir, variant_dir_name in variant_dirs:
+                    VersionIndex.__list_variant_dir(backend, publish_ass_dir, variant_dir_name, cancel_event)
+            else:
+                with ThreadPoolExecutor(max_workers=_LISTING_WORKERS) as executor:
+                    for _ in executor.map(lambda variant_dir: VersionIndex.__list_variant_dir(
+                            backend, variant_dir[0], variant_dir[1], cancel_event), variant_dirs):
+                        pass
+        for publish_ass_dir, variant_dir_name in variant_dirs:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            with self.__lock:
+                found = self.find(publish_ass_dir, variant_dir_name)
+                # Asset not indexed yet, its name will be given by the parsing of the standin
+                if found is not None:
+                    standin_name, versions = found
+                    versions.last_version(variant_dir_name[len(standin_name) + 1:])
+        return True
+
+    def clear(self):
+        """
+        Forget the listings of the session (the persistent cache is revalidated with the mtimes)
+        :return:
+        """
+        with self.__lock:
+            self.__tables.clear()
+            self.__backend.clear()
+
+    def exists_all(self, paths):
+        """
+        Check whether files exist (the files of the versions are given by their status). Can be called from a worker
+        thread, the files are checked without holding the index
+        :param paths
+        :return: path -> exists
+        """
+        with self.__lock:
+            backend = self.__backend
+        return backend.exists_all(paths)
+
+    def get_version_statuses(self, version_dirs):
+        """
+        Getter of the files of many version directories, checked in parallel. Can be called from a worker thread, the
+        directories are listed without holding the index
+        :param version_dirs: list of (version dir, file base)
+        :return: version dir -> VersionStatus
+        """
+        with self.__lock:
+            backend = self.__backend
+        return backend.get_version_statuses(version_dirs)
+
+    def save(self):
+        """
+        Save the persistent cache
+        :return:
+        """
+        with self.__lock:
+            if self.__cache is not None:
+                self.__cache.save()
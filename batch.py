@@ -0,0 +1,156 @@
+"""
+Headless Asset Loader : apply the Asset Loader operations to the standins of many scene files without UI.
+Must be run with mayapy from the directory containing the asset_loader package :
+
+    mayapy -m asset_loader.batch update_to_last shot_010.ma shot_020.mb --report report.json
+
+Operations :
+- audit : only report the standins out of date
+- update_to_last : update all the standins to the last version of their variant
+- to_sd : set all the standins to their SD variant
+- to_hd : set all the standins to their HD variant
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# ######################################################################################################################
+
+_OPERATIONS = ["audit", "update_to_last", "to_sd", "to_hd"]
+
+
+# ######################################################################################################################
+
+def _init_worker(manifest_path=None):
+    """
+    Initialize Maya in a worker process
+    :param manifest_path: publish manifest used to resolve the versions
+    :return:
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    import pymel.core as pm
+    if not pm.pluginInfo("mtoa", query=True, loaded=True):
+        pm.loadPlugin("mtoa", quiet=True)
+    if manifest_path is not None:
+        from asset_loader.VersionIndex import VersionIndex, ManifestBackend, MemoizedBackend, FileSystemBackend
+        VersionIndex.get_instance().set_backend(ManifestBackend(manifest_path, MemoizedBackend(FileSystemBackend())))
+
+
+def _get_standin_report(standin):
+    """
+    Get the report of a standin
+    :param standin
+    :return: report of the standin
+    """
+    return {
+        "object_name": standin.get_object_name(),
+        "asset": standin.get_standin_name(),
+        "variant": standin.get_active_variant(),
+        "version": standin.get_active_version(),
+        "last_version": standin.last_version(),
+        "up_to_date": standin.is_up_to_date(),
+    }
+
+
+def process_scene(scene_path, operation, dry_run=False):
+    """
+    Apply an operation to all the standins of a scene
+    :param scene_path
+    :param operation
+    :param dry_run: whether the scene must not be saved
+    :return: report of the scene
+    """
+    import pymel.core as pm
+    from asset_loader.Standin import Standin
+
+    start = time.time()
+    report = {"scene": scene_path, "operation": operation, "status": "ok", "standins": [], "changed": 0}
+    try:
+        pm.openFile(scene_path, force=True, loadReferenceDepth="all")
+        standins = [standin for standin in (Standin(node) for node in pm.ls(type="aiStandIn")) if standin.is_valid()]
+        before = {standin: _get_standin_report(standin) for standin in standins}
+
+        if operation == "update_to_last":
+            Standin.update_to_last_all(standins)
+        elif operation == "to_sd":
+            Standin.set_to_sd_all(standins)
+        elif operation == "to_hd":
+            Standin.set_to_hd_all(standins)
+
+        for standin in standins:
+            standin_report = before[standin]
+            after = _get_standin_report(standin)
+            standin_report["changed"] = after["variant"] != standin_report["variant"] or \
+                after["version"] != standin_report["version"]
+            if standin_report["changed"]:
+                standin_report["new_variant"] = after["variant"]
+                standin_report["new_version"] = after["version"]
+                report["changed"] += 1
+            report["standins"].append(standin_report)
+
+        if report["changed"] > 0 and not dry_run:
+            pm.saveFile(force=True)
+    except Exception as e:
+        report["status"] = "error"
+        report["error"] = str(e)
+    report["time"] = time.time() - start
+    return report
+
+
+def run(scene_paths, operation, workers=None, dry_run=False, manifest_path=None):
+    """
+    Apply an operation to the standins of many scenes in parallel (one Maya per worker process)
+    :param scene_paths
+    :param operation
+    :param workers: number of worker processes
+    :param dry_run: whether the scenes must not be saved
+    :param manifest_path: publish manifest used to resolve the versions
+    :return: reports of the scenes
+    """
+    reports = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(manifest_path,)) as executor:
+        futures = [executor.submit(process_scene, scene_path, operation, dry_run) for scene_path in scene_paths]
+        for scene_path, future in zip(scene_paths, futures):
+            # A worker crashed (BrokenProcessPool) or a report not picklable only fails its scenes
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                reports.append({"scene": scene_path, "operation": operation, "status": "error",
+                                "error": type(e).__name__ + " : " + str(e)})
+    return reports
+
+
+def main(argv=None):
+    """
+    Entry point of the command line
+    :param argv
+    :return: exit code
+    """
+    parser = argparse.ArgumentParser(description="Apply the Asset Loader operations to many scenes without UI")
+    parser.add_argument("operation", choices=_OPERATIONS)
+    parser.add_argument("scenes", nargs="+", help=".ma or .mb files")
+    parser.add_argument("--workers", type=int, default=None, help="number of Maya processes in parallel")
+    parser.add_argument("--dry-run", action="store_true", help="do not save the scenes")
+    parser.add_argument("--report", default="-", help="path of the JSON report (- for stdout)")
+    parser.add_argument("--manifest", default=None, help="publish manifest used to resolve the versions")
+    args = parser.parse_args(argv)
+
+    scene_paths = [os.path.abspath(scene) for scene in args.scenes]
+    reports = run(scene_paths, args.operation, args.workers, args.dry_run, args.manifest)
+
+    if args.report == "-":
+        json.dump(reports, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0 if all(report["status"] == "ok" for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+"""
+Minimal in-process stand-in for the pymel.core and maya.OpenMaya calls used by Asset Loader (and for the
+parse_standin function of the common package) so the hot paths can be measured outside of Maya
+"""
+
+import os
+import sys
+import types
+
+# ######################################################################################################################
+
+_STANDIN_TYPE = "aiStandIn"
+_TRANSFORM_TYPE = "transform"
+
+
+# ######################################################################################################################
+
+class FakeAttribute:
+    def __init__(self, value=None):
+        """
+        Constructor
+        :param value
+        """
+        self.__value = value
+
+    def get(self):
+        """
+        Getter of the value
+        :return: value
+        """
+        return self.__value
+
+    def set(self, value):
+        """
+        Setter of the value
+        :param value
+        :return:
+        """
+        self.__value = value
+
+
+class FakeNode:
+    def __init__(self, name, node_type, parent=None):
+        """
+        Constructor
+        :param name
+        :param node_type
+        :param parent
+        """
+        self.__name = name
+        self.__type = node_type
+        self.__parent = parent
+        self.__children = []
+        if parent is not None:
+            parent.__children.append(self)
+        self.dso = FakeAttribute()
+        self.visibility = FakeAttribute(True)
+
+    def name(self):
+        """
+        Getter of the name
+        :return: name
+        """
+        return self.__name
+
+    def type(self):
+        """
+        Getter of the type
+        :return: type
+        """
+        return self.__type
+
+    def getParent(self):
+        """
+        Getter of the parent
+        :return: parent
+        """
+        return self.__parent
+
+    def getChildren(self):
+        """
+        Getter of the children
+        :return: children
+        """
+        return self.__children
+
+    def getShape(self):
+        """
+        Getter of the first shape
+        :return: shape
+        """
+        for child in self.__children:
+            if child.type() != _TRANSFORM_TYPE:
+                return child
+        return None
+
+    def hasFn(self, fn):
+        """
+        Getter of whether the node is of a function set type (MObject)
+        :param fn: MFn type
+        :return: has fn
+        """
+        return (self.__type == _TRANSFORM_TYPE) == (fn == MFn.kTransform)
+
+    def get_ancestry(self):
+        """
+        Getter of the nodes from the root to this node (DAG path)
+        :return: nodes
+        """
+        nodes = []
+        node = self
+        while node is not None:
+            nodes.append(node)
+            node = node.__parent
+        return list(reversed(nodes))
+
+
+class FakeScene:
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.nodes = []
+        self.nodes_by_name = {}
+        self.selection = []
+
+    def __add_node(self, node):
+        """
+        Add a node to the scene
+        :param node
+        :return:
+        """
+        self.nodes.append(node)
+        self.nodes_by_name[node.name()] = node
+
+    def create_transform(self, name, parent=None):
+        """
+        Create a transform
+        :param name
+        :param parent
+        :return: transform
+        """
+        transform = FakeNode(name, _TRANSFORM_TYPE, parent)
+        self.__add_node(transform)
+        return transform
+
+    def create_standin(self, name, dso, parent=None):
+        """
+        Create a transform with a standin shape
+        :param name: name of the transform
+        :param dso
+        :param parent
+        :return: standin shape
+        """
+        transform = self.create_transform(name, parent)
+        standin = FakeNode(name + "Shape", _STANDIN_TYPE, transform)
+        standin.dso.set(dso)
+        self.__add_node(standin)
+        return standin
+
+
+# ######################################################################################################################
+
+_scene = FakeScene()
+
+
+def get_scene():
+    """
+    Getter of the current fake scene
+    :return: scene
+    """
+    return _scene
+
+
+def new_scene():
+    """
+    Replace the current fake scene by an empty one
+    :return: scene
+    """
+    global _scene
+    _scene = FakeScene()
+    return _scene
+
+
+def PyNode(name):
+    return _scene.nodes_by_name[name]
+
+
+def undoInfo(**kwargs):
+    return None
+
+
+def refresh(**kwargs):
+    return None
+
+
+def parse_standin(standin):
+    """
+    Stand-in of common.standin_utils.parse_standin for the synthetic publish tree (asset names without underscore)
+    :param standin
+    :return: parsed data
+    """
+    dso = standin.dso.get()
+    parsed_data = {"object_name": standin.getParent().name(), "valid": False}
+    if not dso:
+        return parsed_data
+    version_dir = os.path.dirname(dso)
+    variant_dir = os.path.dirname(version_dir)
+    publish_ass_dir = os.path.dirname(variant_dir)
+    standin_name, active_variant = os.path.basename(variant_dir).split("_", 1)
+    standin_versions = {}
+    for variant_dir_name in sorted(os.listdir(publish_ass_dir)):
+        if variant_dir_name.startswith(standin_name + "_"):
+            variant_versions = sorted(os.listdir(publish_ass_dir + "/" + variant_dir_name), reverse=True)
+            standin_versions[variant_dir_name[len(standin_name) + 1:]] = \
+                [(version, publish_ass_dir + "/" + variant_dir_name + "/" + version) for version in variant_versions]
+    parsed_data.update({
+        "valid": True,
+        "standin_name": standin_name,
+        "publish_ass_dir": publish_ass_dir,
+        "active_variant": active_variant,
+        "active_version": os.path.basename(version_dir),
+        "standin_versions": standin_versions})
+    return parsed_data
+
+
+# ######################################################################################################################
+# maya.OpenMaya (API 1) calls of the inventory and of the stale report
+
+class MFn:
+    kShape = "shape"
+    # The only shapes of the fake scenes are standins
+    kPluginShape = "pluginShape"
+    kTransform = "transform"
+
+
+class MObjectHandle:
+    def __init__(self, node):
+        self.__node = node
+
+    def hashCode(self):
+        return id(self.__node)
+
+    def isValid(self):
+        return True
+
+    def object(self):
+        return self.__node
+
+
+class MDagPath:
+    def __init__(self, other=None):
+        """
+        Constructor
+        :param other: path copied
+        """
+        self.__nodes = list(other.__nodes) if other is not None else []
+
+    def set_node(self, node):
+        """
+        Set the path of a node
+        :param node
+        :return:
+        """
+        self.__nodes = node.get_ancestry()
+
+    def node(self):
+        return self.__nodes[-1]
+
+    def length(self):
+        # The world is not counted
+        return len(self.__nodes)
+
+    def pop(self):
+        self.__nodes.pop()
+
+    def push(self, node):
+        self.__nodes.append(node)
+
+    def partialPathName(self):
+        return self.__nodes[-1].name()
+
+    def childCount(self):
+        return len(self.__nodes[-1].getChildren())
+
+    def child(self, index):
+        return self.__nodes[-1].getChildren()[index]
+
+
+class _MPlug:
+    def __init__(self, attribute):
+        """
+        Constructor
+        :param attribute: FakeAttribute
+        """
+        self.__attribute = attribute
+
+    def asString(self):
+        return self.__attribute.get() or ""
+
+
+class MFnDagNode:
+    def __init__(self, obj=None):
+        """
+        Constructor
+        :param obj: MDagPath or node
+        """
+        self.__node = None
+        if obj is not None:
+            self.setObject(obj)
+
+    def setObject(self, obj):
+        self.__node = obj.node() if isinstance(obj, MDagPath) else obj
+
+    def typeName(self):
+        return self.__node.type()
+
+    def partialPathName(self):
+        return self.__node.name()
+
+    def findPlug(self, name):
+        return _MPlug(getattr(self.__node, name))
+
+
+MFnDependencyNode = MFnDagNode
+
+
+class MObjectArray(list):
+    pass
+
+
+class MItDag:
+    kDepthFirst = 0
+
+    def __init__(self, traversal, fn):
+        """
+        Constructor (depth first over the nodes of a type)
+        :param traversal
+        :param fn: MFn type
+        """
+        self.__nodes = []
+        stack = list(reversed([node for node in _scene.nodes if node.getParent() is None]))
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.hasFn(fn):
+                self.__nodes.append(node)
+            stack.extend(reversed(node.getChildren()))
+        self.__index = 0
+
+    def isDone(self):
+        return self.__index >= len(self.__nodes)
+
+    def next(self):
+        self.__index += 1
+
+    def getPath(self, path):
+        path.set_node(self.__nodes[self.__index])
+
+
+class MItDependencyNodes:
+    def __init__(self, fn):
+        """
+        Constructor
+        :param fn: MFn type
+        """
+        self.__nodes = [node for node in _scene.nodes if node.hasFn(fn)]
+        self.__index = 0
+
+    def isDone(self):
+        return self.__index >= len(self.__nodes)
+
+    def next(self):
+        self.__index += 1
+
+    def thisNode(self):
+        return self.__nodes[self.__index]
+
+
+class MSelectionList:
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.nodes = []
+
+    def length(self):
+        return len(self.nodes)
+
+    def getDagPath(self, index, path):
+        path.set_node(self.nodes[index])
+
+
+class MGlobal:
+    @staticmethod
+    def getActiveSelectionList(selection):
+        selection.nodes = list(_scene.selection)
+
+
+# ######################################################################################################################
+
+def install():
+    """
+    Install the stand-ins as the pymel.core, maya.OpenMaya and common.standin_utils modules
+    :return:
+    """
+    this_module = sys.modules[__name__]
+    maya = sys.modules.get("maya", types.ModuleType("maya"))
+    maya.OpenMaya = this_module
+    sys.modules["maya"] = maya
+    sys.modules["maya.OpenMaya"] = this_module
+    pymel = types.ModuleType("pymel")
+    pymel.core = this_module
+    sys.modules["pymel"] = pymel
+    sys.modules["pymel.core"] = this_module
+
+    common = sys.modules.get("common", types.ModuleType("common"))
+    standin_utils = types.ModuleType("common.standin_utils")
+    standin_utils.parse_standin = parse_standin
+    standin_utils.__all__ = ["parse_standin"]
+    common.standin_utils = standin_utils
+    sys.modules["common"] = common
+    sys.modules["common.standin_utils"] = standin_utils
@@ -0,0 +1,163 @@
+"""
+Benchmarks of the hot paths of Asset Loader on a synthetic publish tree, outside of Maya :
+
+    python benchmarks/run_benchmarks.py --sizes 100 1000 10000 --json bench.json
+"""
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import fake_pymel
+import synthetic_publish
+
+# ######################################################################################################################
+
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PACKAGE_NAME = "asset_loader"
+
+
+# ######################################################################################################################
+
+def import_asset_loader():
+    """
+    Import the asset_loader package with the pymel stand-in
+    :return: asset_loader package
+    """
+    fake_pymel.install()
+    if _PACKAGE_NAME not in sys.modules:
+        spec = importlib.util.spec_from_file_location(_PACKAGE_NAME, os.path.join(_ROOT_DIR, "__init__.py"),
+                                                      submodule_search_locations=[_ROOT_DIR])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[_PACKAGE_NAME] = package
+        spec.loader.exec_module(package)
+    return sys.modules[_PACKAGE_NAME]
+
+
+def build_scene(assets, nb_nodes, seed=0):
+    """
+    Build a fake scene with standins spread on the assets (instances of the same assets)
+    :param assets: assets of the synthetic publish tree
+    :param nb_nodes: number of standins
+    :param seed
+    :return: scene
+    """
+    rand = random.Random(seed)
+    scene = fake_pymel.new_scene()
+    root = scene.create_transform("set")
+    for node_index in range(nb_nodes):
+        publish_ass_dir, asset, variants, versions = assets[node_index % len(assets)]
+        variant = rand.choice(variants)
+        version = rand.choice(versions)
+        variant_dir_name = asset + "_" + variant
+        dso = publish_ass_dir + "/" + variant_dir_name + "/" + version + "/" + variant_dir_name + ".ass"
+        scene.create_standin("standin%06d" % node_index, dso, root)
+    return scene
+
+
+def timed(func):
+    """
+    Time a function
+    :param func
+    :return: result and time in seconds
+    """
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def bench_size(assets, nb_nodes):
+    """
+    Run the benchmarks for a number of standins
+    :param assets: assets of the synthetic publish tree
+    :param nb_nodes: number of standins
+    :return: timings by benchmark name
+    """
+    standin_module = importlib.import_module(_PACKAGE_NAME + ".Standin")
+    Standin = standin_module.Standin
+    VersionIndex = standin_module.VersionIndex
+    StandinInventory = importlib.import_module(_PACKAGE_NAME + ".StandinInventory").StandinInventory
+    StaleReport = importlib.import_module(_PACKAGE_NAME + ".StaleReport").StaleReport
+
+    scene = build_scene(assets, nb_nodes)
+    timings = {}
+
+    def retrieve(previous_standins):
+        # Retrieval of the tool : the standins of the selection, or without selection the ones out of date
+        return Standin.retrieve_standins(StandinInventory(), previous_standins)
+
+    VersionIndex.reset_instance()
+    ood_standins, timings["retrieve_cold"] = timed(lambda: retrieve({}))
+    _, timings["retrieve_warm"] = timed(lambda: retrieve(ood_standins))
+    # One transform out of ten selected
+    transforms = [node for node in scene.nodes if node.type() == "transform" and node.getParent() is not None]
+    scene.selection = transforms[::10]
+    _, timings["retrieve_selection"] = timed(lambda: retrieve({}))
+    scene.selection = []
+
+    try:
+        table_module = importlib.import_module(_PACKAGE_NAME + ".StandinTableModel")
+        from PySide2.QtCore import Qt
+        from PySide2.QtWidgets import QApplication
+    except ImportError:
+        timings["table_refresh"] = None
+    else:
+        app = QApplication.instance() or QApplication([])
+
+        def refresh_table():
+            model = table_module.StandinTableModel(os.path.join(_ROOT_DIR, "assets"))
+            model.set_standins(list(ood_standins.values()))
+            for row in range(model.rowCount()):
+                for column in range(model.columnCount()):
+                    index = model.index(row, column)
+                    model.data(index, Qt.DisplayRole)
+                    model.data(index, Qt.DecorationRole)
+        _, timings["table_refresh"] = timed(refresh_table)
+
+    _, timings["stale_report"] = timed(lambda: StaleReport.from_scene(VersionIndex.get_instance()).get_summary())
+
+    _, timings["bulk_update_to_last"] = timed(lambda: Standin.update_to_last_all(list(ood_standins.values())))
+    return timings
+
+
+def main(argv=None):
+    """
+    Entry point of the command line
+    :param argv
+    :return: exit code
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks of Asset Loader on a synthetic publish tree")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="numbers of standins")
+    parser.add_argument("--assets", type=int, default=40, help="number of assets")
+    parser.add_argument("--variants", type=int, default=2, help="number of HD/SD pairs of variants per asset")
+    parser.add_argument("--versions", type=int, default=5, help="number of versions per variant")
+    parser.add_argument("--publish-dir", default=None, help="directory of the synthetic publish tree")
+    parser.add_argument("--json", default=None, help="path of the JSON results")
+    args = parser.parse_args(argv)
+
+    import_asset_loader()
+    publish_dir = args.publish_dir if args.publish_dir is not None else \
+        os.path.join(tempfile.gettempdir(), "asset_loader_bench_publish")
+    assets = synthetic_publish.generate_publish_tree(publish_dir, args.assets, args.variants, args.versions)
+
+    results = {}
+    for nb_nodes in args.sizes:
+        timings = bench_size(assets, nb_nodes)
+        results[nb_nodes] = timings
+        print("%6d standins : " % nb_nodes + " | ".join(
+            "%s %s" % (name, "skipped" if value is None else "%.4fs" % value) for name, value in timings.items()))
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
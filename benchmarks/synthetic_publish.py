@@ -0,0 +1,48 @@
+import os
+
+# ######################################################################################################################
+
+_LODS = ["HD", "SD"]
+
+
+# ######################################################################################################################
+
+def get_version_name(version_index):
+    """
+    Get the name of a version
+    :param version_index
+    :return: version name
+    """
+    return "v%03d" % (version_index + 1)
+
+
+def generate_publish_tree(root, nb_assets, nb_variants, nb_versions):
+    """
+    Generate a publish hierarchy <root>/<asset>/<asset>_<variant>/<version>/<asset>_<variant>.ass (and .ma).
+    Each variant exists in HD and in SD
+    :param root
+    :param nb_assets
+    :param nb_variants: number of HD/SD pairs of variants per asset
+    :param nb_versions: number of versions per variant
+    :return: list of (publish ass dir, asset name, variants, versions)
+    """
+    assets = []
+    versions = [get_version_name(i) for i in range(nb_versions)]
+    for asset_index in range(nb_assets):
+        asset = "asset%04d" % asset_index
+        publish_ass_dir = os.path.join(root, asset).replace("\\", "/")
+        variants = ["var%02d%s" % (variant_index, lod) for variant_index in range(nb_variants) for lod in _LODS]
+        for variant in variants:
+            variant_dir_name = asset + "_" + variant
+            for version in versions:
+                version_dir = publish_ass_dir + "/" + variant_dir_name + "/" + version
+                if not os.path.isdir(version_dir):
+                    os.makedirs(version_dir)
+                for ext in [".ass", ".ma"]:
+                    file_path = version_dir + "/" + variant_dir_name + ext
+                    # Not empty, an empty .ass is an incomplete publish
+                    if not os.path.isfile(file_path) or os.path.getsize(file_path) == 0:
+                        with open(file_path, "w") as f:
+                            f.write("### " + variant_dir_name + "\n")
+        assets.append((publish_ass_dir, asset, variants, versions))
+    return assets
@@ -1,13 +1,17 @@
-import importlib
-from common import utils
+import os
+import sys
+
+# Developer mode : the package is reloaded on each launch to take the changes of the code
+if os.environ.get("ASSET_LOADER_DEV"):
+    import importlib
+    from common import utils
+
+    if "asset_loader.AssetLoader" in sys.modules:
+        sys.modules["asset_loader.AssetLoader"].AssetLoader.delete_instance()
+    utils.unload_packages(silent=True, package="asset_loader")
+    importlib.import_module("asset_loader")
 
-utils.unload_packages(silent=True, package="asset_loader")
-importlib.import_module("asset_loader")
 from asset_loader.AssetLoader import AssetLoader
-try:
-    app.close()
-except:
-    pass
-app = AssetLoader()
-app.show()
 
+# The dialog is kept alive between two launches
+AssetLoader.show_instance()
@@ -0,0 +1,42 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+# ######################################################################################################################
+
+_PACKAGE_NAME = "asset_loader"
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The repository is the asset_loader package
+if _PACKAGE_NAME not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(_PACKAGE_NAME, os.path.join(_ROOT_DIR, "__init__.py"),
+                                                   submodule_search_locations=[_ROOT_DIR])
+    _package = importlib.util.module_from_spec(_spec)
+    sys.modules[_PACKAGE_NAME] = _package
+    _spec.loader.exec_module(_package)
+
+
+# ######################################################################################################################
+
+@pytest.fixture
+def publish(tmp_path):
+    """
+    Publish versions in a temporary publish directory <tmp_path>/<asset>/<asset>_<variant>/<version>
+    :param tmp_path
+    :return: function publishing a version and giving its dso
+    """
+    def publish_version(asset, variant, version, ass="### ass\n", ma=True, pending_ext=None):
+        variant_dir_name = asset + "_" + variant
+        version_dir = tmp_path / asset / variant_dir_name / version
+        version_dir.mkdir(parents=True, exist_ok=True)
+        (version_dir / (variant_dir_name + ".ass")).write_text(ass)
+        if ma:
+            (version_dir / (variant_dir_name + ".ma")).write_text("//Maya ASCII\n")
+        # File written next to the .ass while it is being published
+        if pending_ext is not None:
+            (version_dir / (variant_dir_name + pending_ext)).write_text("")
+        return str(version_dir / (variant_dir_name + ".ass")).replace("\\", "/")
+
+    return publish_version
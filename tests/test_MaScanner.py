@@ -0,0 +1,36 @@
+from asset_loader.MaScanner import MaScanner
+
+# ######################################################################################################################
+
+_DSO = "/prod/assets/chair/publish/ass/chair_woodHD/v003/chair_woodHD.ass"
+
+
+def _write_scene(tmp_path, content):
+    scene_path = tmp_path / "scene.ma"
+    scene_path.write_text(content)
+    return str(scene_path)
+
+
+def test_parse_standins_single_line(tmp_path):
+    scene_path = _write_scene(tmp_path, (
+        'createNode transform -n "chair";\n'
+        'createNode aiStandIn -n "chairShape" -p "chair";\n'
+        '\tsetAttr ".dso" -type "string" "%s";\n' % _DSO))
+    assert MaScanner.parse_standins(scene_path) == [{"node": "chairShape", "parent": "chair", "dso": _DSO}]
+
+
+def test_parse_standins_long_string_concatenated(tmp_path):
+    # Maya splits the long strings in parentheses on several lines
+    scene_path = _write_scene(tmp_path, (
+        'createNode transform -n "chair";\n'
+        'createNode aiStandIn -n "chairShape" -p "chair";\n'
+        '\tsetAttr ".dso" -type "string" ("/prod/assets/chair/publish/ass/chair_woodHD/v003/"\n'
+        '\t\t+ "chair_woodHD.ass");\n'))
+    assert MaScanner.parse_standins(scene_path) == [{"node": "chairShape", "parent": "chair", "dso": _DSO}]
+
+
+def test_parse_standins_edited_in_reference(tmp_path):
+    scene_path = _write_scene(tmp_path, (
+        'setAttr "set:chairShape.dso" -type "string" ("/prod/assets/chair/publish/ass/"\n'
+        '\t\t+ "chair_woodHD/v003/chair_woodHD.ass");\n'))
+    assert MaScanner.parse_standins(scene_path) == [{"node": "set:chairShape", "parent": None, "dso": _DSO}]
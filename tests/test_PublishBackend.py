@@ -0,0 +1,131 @@
+import json
+import os
+
+from asset_loader.PublishBackend import MANIFEST_FORMAT, FileSystemBackend, ManifestBackend, MemoizedBackend, \
+    VersionStatus, get_lod_pairs
+
+
+# ######################################################################################################################
+
+class _CountingBackend(FileSystemBackend):
+    """
+    Filesystem backend counting the accesses to the version directories
+    """
+
+    def __init__(self):
+        self.nb_status = 0
+
+    def get_version_status(self, version_dir, file_base):
+        self.nb_status += 1
+        return super(_CountingBackend, self).get_version_status(version_dir, file_base)
+
+
+def _split(dso):
+    version_dir, filename = os.path.split(dso)
+    return version_dir, os.path.splitext(filename)[0]
+
+
+def test_get_lod_pairs():
+    pairs = get_lod_pairs(["woodHD", "woodSD", "woodLD", "metalHD", "stone"])
+    assert pairs == {"woodHD": {"SD": "woodSD", "LD": "woodLD"},
+                     "woodSD": {"HD": "woodHD", "LD": "woodLD"},
+                     "woodLD": {"HD": "woodHD", "SD": "woodSD"}}
+
+
+def test_get_lod_pairs_variant_dir_names():
+    pairs = get_lod_pairs(["chair_woodHD", "chair_woodPROXY"])
+    assert pairs == {"chair_woodHD": {"PROXY": "chair_woodPROXY"}, "chair_woodPROXY": {"HD": "chair_woodHD"}}
+
+
+def test_version_status(publish):
+    complete = publish("chair", "woodHD", "v001")
+    empty = publish("chair", "woodHD", "v002", ass="")
+    locked = publish("chair", "woodHD", "v003", ma=False, pending_ext=".lock")
+    backend = FileSystemBackend()
+    assert backend.get_version_status(*_split(complete)) == VersionStatus(len("### ass\n"), True, True)
+    assert backend.get_version_status(*_split(empty)) == VersionStatus(0, True, False)
+    assert backend.get_version_status(*_split(locked)) == VersionStatus(len("### ass\n"), False, False)
+    missing_dir = os.path.dirname(os.path.dirname(complete)) + "/v009"
+    assert backend.get_version_status(missing_dir, "chair_woodHD") == VersionStatus(-1, False, False)
+
+
+def test_memoized_complete_status(publish):
+    dso = publish("chair", "woodHD", "v001")
+    counting = _CountingBackend()
+    backend = MemoizedBackend(counting)
+    for _ in range(3):
+        assert backend.get_version_status(*_split(dso)).complete
+    assert counting.nb_status == 1
+    assert backend.get_pending_dirs() == []
+
+
+def test_memoized_incomplete_status_until_refresh(publish):
+    dso = publish("chair", "woodHD", "v001", ass="")
+    version_dir, file_base = _split(dso)
+    counting = _CountingBackend()
+    backend = MemoizedBackend(counting)
+    assert not backend.get_version_status(version_dir, file_base).complete
+    nb_status = counting.nb_status
+    # Kept until its directory is refreshed
+    assert not backend.get_version_status(version_dir, file_base).complete
+    assert counting.nb_status == nb_status
+    assert backend.get_pending_dirs() == [version_dir]
+    assert version_dir in backend.get_listed_mtimes()
+
+    publish("chair", "woodHD", "v001")
+    backend.refresh([version_dir])
+    assert backend.get_version_status(version_dir, file_base).complete
+    assert backend.get_pending_dirs() == []
+
+
+def test_memoized_statuses_and_exists(publish):
+    dsos = [publish("chair", "woodHD", "v%03d" % version) for version in range(1, 5)]
+    counting = _CountingBackend()
+    backend = MemoizedBackend(counting)
+    statuses = backend.get_version_statuses([_split(dso) for dso in dsos])
+    assert sorted(statuses.keys()) == sorted(os.path.dirname(dso) for dso in dsos)
+    assert all(status.complete for status in statuses.values())
+    exists = backend.exists_all(dsos + [dsos[0][:-len(".ass")] + ".ma", dsos[0] + ".missing"])
+    assert exists == dict([(dso, True) for dso in dsos] + [(dsos[0][:-len(".ass")] + ".ma", True),
+                                                         (dsos[0] + ".missing", False)])
+    # The version directories are listed once
+    assert counting.nb_status == len(dsos)
+
+
+def test_memoized_listings(publish):
+    dso = publish("chair", "woodHD", "v001")
+    publish_ass_dir = os.path.dirname(os.path.dirname(os.path.dirname(dso)))
+    backend = MemoizedBackend(FileSystemBackend())
+    assert backend.list_variants(publish_ass_dir) == ["chair_woodHD"]
+    publish("chair", "woodSD", "v001")
+    # Listed once for the session
+    assert backend.list_variants(publish_ass_dir) == ["chair_woodHD"]
+    backend.refresh([publish_ass_dir])
+    assert backend.list_variants(publish_ass_dir) == ["chair_woodHD", "chair_woodSD"]
+
+
+def test_manifest_backend(tmp_path, publish):
+    complete = publish("chair", "woodHD", "v001")
+    incomplete = publish("chair", "woodHD", "v002", ass="")
+    publish_ass_dir = os.path.dirname(os.path.dirname(os.path.dirname(complete)))
+    variant_dir = publish_ass_dir + "/chair_woodHD"
+    manifest_path = str(tmp_path / "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump({"format": MANIFEST_FORMAT, "publish_dirs": {publish_ass_dir: {"mtime": 1.0, "variants": {
+            "chair_woodHD": {"mtime": 2.0, "versions": {"v001": [10, True, True], "v002": [0, True, False]}}}}}}, f)
+    counting = _CountingBackend()
+    backend = ManifestBackend(manifest_path, fallback=MemoizedBackend(counting))
+    assert backend.list_variants(publish_ass_dir) == ["chair_woodHD"]
+    assert backend.list_versions(variant_dir) == ["v001", "v002"]
+    assert backend.get_mtime(variant_dir) == 2.0
+    # The complete versions are read from the manifest, the incomplete ones are checked again
+    assert backend.get_version_status(*_split(complete)) == VersionStatus(10, True, True)
+    assert counting.nb_status == 0
+    assert backend.get_version_status(*_split(incomplete)) == VersionStatus(0, True, False)
+    assert backend.get_pending_dirs() == [os.path.dirname(incomplete)]
+    # Unknown directories are delegated to the fallback
+    assert backend.list_variants(str(tmp_path)) == ["chair"]
+
+    publish("chair", "woodHD", "v003")
+    backend.refresh([variant_dir])
+    assert backend.list_versions(variant_dir) == ["v001", "v002", "v003"]
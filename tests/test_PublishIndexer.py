@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from asset_loader.PublishBackend import ManifestBackend, VersionStatus
+from asset_loader.PublishIndexer import PublishIndexer
+
+
+# ######################################################################################################################
+
+def _index(publish):
+    publish("chair", "woodHD", "v001")
+    publish("chair", "woodHD", "v002", ass="")
+    publish("chair", "woodSD", "v001", ma=False)
+    dso = publish("table", "oakHD", "v003")
+    publish_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(dso))))
+    publish_ass_dirs = [publish_root + "/chair", publish_root + "/table"]
+    return publish_ass_dirs, PublishIndexer(workers=4).index(publish_ass_dirs)
+
+
+def test_index(publish):
+    publish_ass_dirs, manifest = _index(publish)
+    chair = manifest["publish_dirs"][publish_ass_dirs[0]]
+    assert sorted(chair["variants"].keys()) == ["chair_woodHD", "chair_woodSD"]
+    assert chair["variants"]["chair_woodHD"]["versions"] == {"v001": [len("### ass\n"), True, True],
+                                                             "v002": [0, True, False]}
+    assert chair["variants"]["chair_woodSD"]["versions"] == {"v001": [len("### ass\n"), False, True]}
+    assert chair["pairs"] == {"chair_woodHD": {"SD": "chair_woodSD"}, "chair_woodSD": {"HD": "chair_woodHD"}}
+    assert list(manifest["publish_dirs"][publish_ass_dirs[1]]["variants"].keys()) == ["table_oakHD"]
+
+
+@pytest.mark.parametrize("extension", [".json", ".sqlite"])
+def test_manifest_round_trip(tmp_path, publish, extension):
+    publish_ass_dirs, manifest = _index(publish)
+    manifest_path = str(tmp_path / ("manifest" + extension))
+    PublishIndexer.write_manifest(manifest, manifest_path)
+    read = ManifestBackend.read_manifest(manifest_path)
+    assert read["format"] == manifest["format"]
+    for publish_ass_dir, publish_data in manifest["publish_dirs"].items():
+        read_data = read["publish_dirs"][publish_ass_dir]
+        assert read_data["mtime"] == publish_data["mtime"]
+        for variant_dir_name, variant_data in publish_data["variants"].items():
+            assert read_data["variants"][variant_dir_name]["mtime"] == variant_data["mtime"]
+            assert read_data["variants"][variant_dir_name]["versions"] == variant_data["versions"]
+
+    backend = ManifestBackend(manifest_path)
+    variant_dir = publish_ass_dirs[0] + "/chair_woodHD"
+    assert backend.list_variants(publish_ass_dirs[0]) == ["chair_woodHD", "chair_woodSD"]
+    assert backend.list_versions(variant_dir) == ["v001", "v002"]
+    assert backend.get_version_status(variant_dir + "/v001", "chair_woodHD") == VersionStatus(len("### ass\n"),
+                                                                                               True, True)
+
+
+def test_index_incremental(publish):
+    publish_ass_dirs, manifest = _index(publish)
+    # The version being published is done
+    publish("chair", "woodHD", "v002")
+    indexer = PublishIndexer(workers=4, previous_manifest=manifest)
+    reindexed = indexer.index(publish_ass_dirs)
+    assert indexer.get_nb_listed() == 0
+    assert indexer.get_nb_reused() == 3
+    versions = reindexed["publish_dirs"][publish_ass_dirs[0]]["variants"]["chair_woodHD"]["versions"]
+    assert versions["v002"] == [len("### ass\n"), True, True]
@@ -0,0 +1,58 @@
+import os
+
+from asset_loader.StaleReport import StaleReport
+from asset_loader.VersionIndex import VersionIndex
+
+
+# ######################################################################################################################
+
+def _report(publish):
+    dsos = {version: publish("chair", "woodHD", version) for version in ["v001", "v002", "v003"]}
+    # Version still being published, not the last usable one
+    dsos["v004"] = publish("chair", "woodHD", "v004", ass="")
+    sd_dso = publish("chair", "woodSD", "v001")
+    index = VersionIndex()
+    index.add(os.path.dirname(os.path.dirname(os.path.dirname(sd_dso))), "chair")
+    report = StaleReport(index)
+    report.add_dsos([dsos["v003"], dsos["v003"], dsos["v002"], dsos["v001"], dsos["v004"], sd_dso,
+                     "/outside/of/the/publishes.ass"])
+    return report, dsos
+
+
+def test_stale_nodes(publish):
+    report, _ = _report(publish)
+    assert report.get_nb_nodes() == 7
+    assert list(report.get_stale_node_indices()) == [2, 3, 4]
+    assert list(report.get_stale_node_indices(include_unresolved=True)) == [2, 3, 4, 6]
+    # Not collected from the scene
+    assert report.get_stale_node_names() == []
+
+
+def test_summary_gaps(publish):
+    report, dsos = _report(publish)
+    summary = report.get_summary()
+    assert summary["nodes"] == 7
+    assert summary["stale"] == 3
+    assert summary["unresolved"] == 1
+    # The version being published is ahead of the last usable one
+    assert summary["by_gap"] == {-1: 1, 1: 1, 2: 1}
+    assert summary["by_asset"] == {"chair": {"nodes": 6, "stale": 3}}
+    publish_ass_dir = os.path.dirname(os.path.dirname(os.path.dirname(dsos["v001"])))
+    assert summary["by_variant"] == {
+        (publish_ass_dir, "chair_woodHD"): {"asset": "chair", "nodes": 5, "stale": 3, "last_version": "v003"},
+        (publish_ass_dir, "chair_woodSD"): {"asset": "chair", "nodes": 1, "stale": 0, "last_version": "v001"}}
+
+
+def test_summary_variants_of_several_libraries(tmp_path):
+    dsos = []
+    for library, last_version in [("lib_a", "v003"), ("lib_b", "v005")]:
+        for version in ["v001", last_version]:
+            version_dir = tmp_path / library / "chair" / "chair_woodHD" / version
+            version_dir.mkdir(parents=True)
+            (version_dir / "chair_woodHD.ass").write_text("### ass\n")
+        dsos.append(str(version_dir.parent / "v001" / "chair_woodHD.ass").replace("\\", "/"))
+    report = StaleReport(VersionIndex())
+    report.add_dsos(dsos)
+    by_variant = report.get_summary()["by_variant"]
+    assert sorted(variant_summary["last_version"] for variant_summary in by_variant.values()) == ["v003", "v005"]
+    assert sorted(variant_dir_name for _, variant_dir_name in by_variant.keys()) == ["chair_woodHD", "chair_woodHD"]
@@ -0,0 +1,85 @@
+import os
+
+from asset_loader.VersionIndex import AssetVersions, VersionIndex
+
+
+# ######################################################################################################################
+
+def _get_publish_ass_dir(dso):
+    return os.path.dirname(os.path.dirname(os.path.dirname(dso)))
+
+
+def test_split_dso():
+    assert VersionIndex.split_dso("/prod/chair/chair_woodHD/v003/chair_woodHD.ass") == (
+        "/prod/chair", "chair_woodHD", "v003")
+    assert VersionIndex.split_dso("/prod/chair/chair_woodHD/v003/other.ass") is None
+    assert VersionIndex.split_dso("") is None
+
+
+def test_asset_versions_listed():
+    versions = AssetVersions("/prod/chair", "chair", versions={
+        "woodHD": [("v002", "/prod/chair/chair_woodHD/v002/chair_woodHD.ass"),
+                   ("v001", "/prod/chair/chair_woodHD/v001/chair_woodHD.ass")],
+        "woodSD": [("v001", "/prod/chair/chair_woodSD/v001/chair_woodSD.ass")]})
+    assert list(versions) == ["woodHD", "woodSD"]
+    assert versions.last_version("woodHD") == "v002"
+    assert versions.last_version("metalHD") is None
+    assert versions.get_lod_counterpart("woodHD", "v001", "SD") == "woodSD"
+    assert versions.get_lod_counterpart("woodHD", "v002", "SD") is None
+
+
+def test_last_version(publish):
+    publish("chair", "woodHD", "v001")
+    dso = publish("chair", "woodHD", "v002")
+    publish("chair", "woodSD", "v001")
+    index = VersionIndex()
+    versions = index.get_versions(_get_publish_ass_dir(dso), "chair")
+    assert list(versions) == ["woodHD", "woodSD"]
+    assert [version for version, _ in versions["woodHD"]] == ["v002", "v001"]
+    assert versions.last_version("woodHD") == "v002"
+    assert index.last_version(_get_publish_ass_dir(dso), "chair_woodHD") == "v002"
+
+
+def test_last_version_skips_incomplete(publish):
+    publish("chair", "woodHD", "v001")
+    publish("chair", "woodHD", "v002", ass="")
+    dso = publish("chair", "woodHD", "v003", pending_ext=".part")
+    publish_ass_dir = _get_publish_ass_dir(dso)
+    index = VersionIndex()
+    versions = index.get_versions(publish_ass_dir, "chair")
+    assert versions.last_version("woodHD") == "v001"
+    assert not versions.is_usable("woodHD", "v002")
+    assert versions.get_statuses("woodHD", ["v001", "v003"])["v003"].complete is False
+    assert sorted(index.get_pending_dirs()) == [publish_ass_dir + "/chair_woodHD/v002",
+                                                publish_ass_dir + "/chair_woodHD/v003"]
+
+
+def test_incomplete_version_refreshed(publish):
+    publish("chair", "woodHD", "v001")
+    dso = publish("chair", "woodHD", "v002", ass="")
+    publish_ass_dir = _get_publish_ass_dir(dso)
+    version_dir = os.path.dirname(dso)
+    index = VersionIndex()
+    versions = index.get_versions(publish_ass_dir, "chair")
+    assert versions.last_version("woodHD") == "v001"
+
+    # Kept until the directory of the version is refreshed
+    publish("chair", "woodHD", "v002")
+    assert versions.last_version("woodHD") == "v001"
+    assert index.get_version_statuses([(version_dir, "chair_woodHD")])[version_dir].complete is False
+    # The table of the asset is reloaded in place
+    assert index.refresh_dirs([version_dir]) == [(publish_ass_dir, "chair")]
+    assert index.get_pending_dirs() == []
+    assert versions.last_version("woodHD") == "v002"
+    assert index.get_version_statuses([(version_dir, "chair_woodHD")])[version_dir].complete
+
+
+def test_find(publish):
+    dso = publish("chair", "woodHD", "v001")
+    publish_ass_dir = _get_publish_ass_dir(dso)
+    index = VersionIndex()
+    assert index.find(publish_ass_dir, "chair_woodHD") is None
+    index.add(publish_ass_dir, "chair")
+    standin_name, versions = index.find(publish_ass_dir, "chair_woodHD")
+    assert standin_name == "chair"
+    assert versions is index.get_versions(publish_ass_dir, "chair")